@@ -9,19 +9,24 @@ bun_zipper_res3 should take less than 2 minutes to render (has about 900 polygon
 bun_zipper_res3 should take less than 25 minutes to render (has about 5000 polygons)
 """
 
+import os
 import trimesh
 from scene.camera import Camera
 from scene.world import World
 from core.color import Color
 from core.point import Point
 from core.vector import Vector
-from objects.polygon import Polygon
+from core import fastvec
 import matplotlib.pyplot as plt
 import numpy as np
 
 
 def load_ply_as_polygons(path):
-    """Loads a .ply file using trimesh and returns a list of Polygon objects."""
+    """
+    Loads a .ply file using trimesh and returns the mesh as flat arrays.
+    :return: Tuple (vertices, faces, normals, material) with (V, 3) float vertices, (F, 3) int32 faces,
+             (F, 3) face normals and the material shared by all triangles.
+    """
     try:
         # Load mesh with error handling
         mesh = trimesh.load(path, force='mesh')
@@ -52,34 +57,16 @@ def load_ply_as_polygons(path):
 
         print(f"Mesh loaded: {len(mesh.vertices)} vertices, {len(mesh.faces)} faces")
 
-        polygons = []
-        t_count = 0
-        for face in mesh.faces:
-            # Get vertices for this face
-            verts = [Point(*mesh.vertices[int(i)]) for i in face]
-
-            # Calculate normal
-            edge1 = verts[1] - verts[0]
-            edge2 = verts[2] - verts[0]
-            normal = edge1.cross(edge2).normalize()
-
-            # Create polygon
-            poly = Polygon(
-                vertices=verts,
-                normal=normal,
-                material={
-                    'ambient_color': Color(0.1, 0.1, 0.1),
-                    'specular_color': Color(1, 1, 1)
-                },
-                color=Color(0.7, 0.7, 0.7),
-                kr=0.0,
-                kt=0.0
-            )
-            polygons.append(poly)
-            t_count += 1
-            print("Triangle created count: ", t_count)
-
-        return polygons
+        # Vertex positions and face normals for all triangles at once
+        vertices = np.asarray(mesh.vertices, dtype=np.float64)
+        faces = np.asarray(mesh.faces, dtype=np.int32)
+        normals = fastvec.face_normals(vertices, faces)
+        material = {
+            'ambient_color': Color(0.1, 0.1, 0.1),
+            'specular_color': Color(1, 1, 1)
+        }
+
+        return vertices, faces, normals, material
 
     except Exception as e:
         print(f"Error loading mesh: {str(e)}")
@@ -89,17 +76,13 @@ def load_ply_as_polygons(path):
 def main():
     world = World()
 
-    # Load mesh polygons
+    # Load mesh arrays
     mesh_path = "bunny/reconstruction/bun_zipper_res4.ply"  # Path to the .ply file
-    mesh_polygons = load_ply_as_polygons(mesh_path)
+    vertices, faces, normals, material = load_ply_as_polygons(mesh_path)
 
-    add_count = 0
-    # Add mesh polygons to the world
-    for poly in mesh_polygons:
-        world.add(poly)
-        add_count += 1
-        # Stanford bunny files can take a while to render, use this print statement to keep track (optional)
-        print("Added polygon to world: ", add_count)
+    # Add the mesh to the world as a single object
+    world.add_mesh(vertices, faces, color=Color(0.7, 0.7, 0.7), normals=normals, material=material)
+    print(f"Added mesh to world: {len(faces)} triangles")
 
     # Light source
     world.light_source = {
@@ -119,7 +102,7 @@ def main():
 
     # Render
     print("Rendering has started...")
-    image = camera.render(world)
+    image = camera.render(world, workers=os.cpu_count())  # Tiles are rendered by one process per CPU
     plt.imshow(image)
     plt.axis('off')
     plt.show()
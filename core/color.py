@@ -4,6 +4,8 @@ Color has rgb (floats), any floating point number
 
 
 class Color:
+    __slots__ = ('rgb',)
+
     def __init__(self, r, g, b):
         self.rgb = (r, g, b)  # RGB values as floats (0.0 to 1.0)
 
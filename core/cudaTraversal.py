@@ -0,0 +1,198 @@
+"""
+CUDA version of the KD-Tree batch traversal, one GPU thread per ray.
+Used by KDTree.intersect_batch when a CUDA device is available, the flattened tree is copied to the device once.
+Set NUMBA_ENABLE_CUDASIM=1 to run the kernel on the CPU simulator.
+"""
+
+import numpy as np
+from numba import cuda
+
+STACK_SIZE = 64  # Deeper trees fall back to the CPU traversal
+THREADS_PER_BLOCK = 128
+
+# float32 constants keep the kernel arithmetic in single precision
+_EPSILON = np.float32(1e-6)
+_MIN_T = np.float32(1e-4)
+_ZERO = np.float32(0.0)
+_ONE = np.float32(1.0)
+_INF = np.float32(np.inf)
+
+
+def available():
+    """
+    Check whether a CUDA device (or the simulator) can be used.
+    :return: True if kernels can be launched.
+    """
+    try:
+        return cuda.is_available()
+    except Exception:
+        return False
+
+
+def to_device(nodes, is_triangle, triangles):
+    """
+    Copy the flattened KD-Tree to the device, the node records are split into one array per field.
+    :param nodes: Structured node array from KDTree.flatten().
+    :return: Tuple of device arrays in the argument order of the kernel.
+    """
+    return tuple(cuda.to_device(np.ascontiguousarray(a)) for a in
+                 (nodes['left'], nodes['right'], nodes['bounds'], nodes['obj_start'], nodes['obj_count'],
+                  is_triangle, triangles))
+
+
+def traverse_batch(origins, directions, inv_dirs, signs, device_tree):
+    """
+    Find the closest triangle hit for every ray of a batch on the GPU.
+    :param origins: (N, 3) array of ray origins.
+    :param directions: (N, 3) array of normalized ray directions.
+    :param inv_dirs: (N, 3) array of inverse directions, inf where a component is 0.
+    :param signs: (N, 3) int8 array of direction sign bits.
+    :param device_tree: Device arrays returned by to_device().
+    :return: Tuple of arrays (t, index, beta, gamma, pending), see KDTree.intersect_batch.
+    """
+    n = len(origins)
+    t = cuda.device_array(n, dtype=np.float32)
+    index = cuda.device_array(n, dtype=np.int32)
+    beta = cuda.device_array(n, dtype=np.float32)
+    gamma = cuda.device_array(n, dtype=np.float32)
+    pending = cuda.device_array(n, dtype=np.bool_)
+
+    blocks = (n + THREADS_PER_BLOCK - 1) // THREADS_PER_BLOCK
+    if blocks:
+        _traverse_kernel[blocks, THREADS_PER_BLOCK](
+            cuda.to_device(np.ascontiguousarray(origins, dtype=np.float32)),
+            cuda.to_device(np.ascontiguousarray(directions, dtype=np.float32)),
+            cuda.to_device(np.ascontiguousarray(inv_dirs, dtype=np.float32)),
+            cuda.to_device(np.ascontiguousarray(signs, dtype=np.int8)),
+            *device_tree, t, index, beta, gamma, pending)
+
+    return (t.copy_to_host().astype(np.float64), index.copy_to_host(), beta.copy_to_host().astype(np.float64),
+            gamma.copy_to_host().astype(np.float64), pending.copy_to_host())
+
+
+@cuda.jit(device=True, inline=True)
+def _moller_trumbore(ox, oy, oz, dx, dy, dz, triangles, i):
+    """
+    Möller–Trumbore test of a ray against row i of the triangle buffer.
+    :return: Tuple (t, beta, gamma), t is -1 on a miss.
+    """
+    e1x, e1y, e1z = triangles[i, 3], triangles[i, 4], triangles[i, 5]
+    e2x, e2y, e2z = triangles[i, 6], triangles[i, 7], triangles[i, 8]
+    hx = dy * e2z - dz * e2y
+    hy = dz * e2x - dx * e2z
+    hz = dx * e2y - dy * e2x
+    a = e1x * hx + e1y * hy + e1z * hz
+    if abs(a) < _EPSILON:
+        return -_ONE, _ZERO, _ZERO
+
+    f = _ONE / a
+    sx = ox - triangles[i, 0]
+    sy = oy - triangles[i, 1]
+    sz = oz - triangles[i, 2]
+    beta = f * (sx * hx + sy * hy + sz * hz)
+    if beta < _ZERO or beta > _ONE:
+        return -_ONE, _ZERO, _ZERO
+
+    qx = sy * e1z - sz * e1y
+    qy = sz * e1x - sx * e1z
+    qz = sx * e1y - sy * e1x
+    gamma = f * (dx * qx + dy * qy + dz * qz)
+    if gamma < _ZERO or beta + gamma > _ONE:
+        return -_ONE, _ZERO, _ZERO
+
+    return f * (e2x * qx + e2y * qy + e2z * qz), beta, gamma
+
+
+@cuda.jit(device=True, inline=True)
+def _slab(bounds, node, ox, oy, oz, inv_x, inv_y, inv_z, sx, sy, sz):
+    """
+    Slab test of a ray against a node's bounding box, see kdTree._slab.
+    :return: Tuple (entry, exit), the box is hit if exit >= entry.
+    """
+    tmin = (bounds[node, sx, 0] - ox) * inv_x
+    tmax = (bounds[node, 1 - sx, 0] - ox) * inv_x
+    tmin = max(tmin, (bounds[node, sy, 1] - oy) * inv_y)
+    tmax = min(tmax, (bounds[node, 1 - sy, 1] - oy) * inv_y)
+    tmin = max(tmin, (bounds[node, sz, 2] - oz) * inv_z)
+    tmax = min(tmax, (bounds[node, 1 - sz, 2] - oz) * inv_z)
+    return max(tmin, _ZERO), tmax
+
+
+@cuda.jit
+def _traverse_kernel(origins, directions, inv_dirs, signs, left, right, bounds, leaf_obj_start, leaf_obj_count,
+                     is_triangle, triangles, t_out, index_out, beta_out, gamma_out, pending_out):
+    """
+    Depth-first traversal for one ray per thread, same visiting order as kdTree._traverse.
+    Rays reaching primitives without a triangle test are flagged as pending.
+    """
+    ray = cuda.grid(1)
+    if ray >= origins.shape[0]:
+        return
+
+    ox, oy, oz = origins[ray, 0], origins[ray, 1], origins[ray, 2]
+    dx, dy, dz = directions[ray, 0], directions[ray, 1], directions[ray, 2]
+    inv_x, inv_y, inv_z = inv_dirs[ray, 0], inv_dirs[ray, 1], inv_dirs[ray, 2]
+    sx, sy, sz = signs[ray, 0], signs[ray, 1], signs[ray, 2]
+
+    best_t = _INF
+    best_index = -1
+    best_beta = _ZERO
+    best_gamma = _ZERO
+    pending = False
+
+    # Per-thread LIFO stack of nodes to visit along with their entry distance
+    stack = cuda.local.array(STACK_SIZE, np.int32)
+    stack_t = cuda.local.array(STACK_SIZE, np.float32)
+    top = 0
+    if left.shape[0] > 0:
+        entry, exit_ = _slab(bounds, 0, ox, oy, oz, inv_x, inv_y, inv_z, sx, sy, sz)
+        if exit_ >= entry:
+            stack[0] = 0
+            stack_t[0] = entry
+            top = 1
+
+    while top > 0:
+        top -= 1
+        node = stack[top]
+        if stack_t[top] > best_t:
+            continue
+
+        if left[node] < 0 and right[node] < 0:
+            start = leaf_obj_start[node]
+            for i in range(start, start + leaf_obj_count[node]):
+                if not is_triangle[i]:
+                    pending = True
+                    continue
+                t, beta, gamma = _moller_trumbore(ox, oy, oz, dx, dy, dz, triangles, i)
+                if _MIN_T < t < best_t:
+                    best_t = t
+                    best_index = i
+                    best_beta = beta
+                    best_gamma = gamma
+            continue
+
+        near = left[node]
+        near_t, exit_ = _slab(bounds, near, ox, oy, oz, inv_x, inv_y, inv_z, sx, sy, sz)
+        near_hit = exit_ >= near_t and near_t <= best_t
+        far = right[node]
+        far_t, exit_ = _slab(bounds, far, ox, oy, oz, inv_x, inv_y, inv_z, sx, sy, sz)
+        far_hit = exit_ >= far_t and far_t <= best_t
+        if far_t < near_t:
+            near, far = far, near
+            near_t, far_t = far_t, near_t
+            near_hit, far_hit = far_hit, near_hit
+
+        if far_hit:
+            stack[top] = far
+            stack_t[top] = far_t
+            top += 1
+        if near_hit:
+            stack[top] = near
+            stack_t[top] = near_t
+            top += 1
+
+    t_out[ray] = best_t
+    index_out[ray] = best_index
+    beta_out[ray] = best_beta
+    gamma_out[ray] = best_gamma
+    pending_out[ray] = pending
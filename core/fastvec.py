@@ -0,0 +1,82 @@
+"""
+Free-function vector kernels on numpy arrays of shape (..., 3).
+Used on hot paths (mesh loading, KD-tree construction) instead of per-element Vector/Point objects,
+which stay at the API boundaries.
+"""
+
+import numpy as np
+
+
+def from_points(points, dtype=np.float64):
+    """
+    Pack a sequence of Points or Vectors into an array.
+    :param points: Iterable of objects with x, y, z attributes.
+    :param dtype: Dtype of the returned array.
+    :return: Array of shape (N, 3).
+    """
+    return np.array([(p.x, p.y, p.z) for p in points], dtype=dtype).reshape(-1, 3)
+
+
+def sub(a, b):
+    """
+    Element-wise difference of two vector arrays.
+    :return: Array a - b.
+    """
+    return a - b
+
+
+def dot(a, b):
+    """
+    Row-wise dot product of two vector arrays.
+    :return: Array of shape (...,).
+    """
+    return np.einsum('...i,...i->...', a, b)
+
+
+def cross(a, b):
+    """
+    Row-wise cross product of two vector arrays.
+    :return: Array of shape (..., 3).
+    """
+    return np.cross(a, b)
+
+
+def length(a):
+    """
+    Row-wise length of a vector array.
+    :return: Array of shape (...,).
+    """
+    return np.sqrt(dot(a, a))
+
+
+def normalize(a):
+    """
+    Normalize every row of a vector array, zero-length rows stay zero (like Vector.normalize).
+    :return: Array of shape (..., 3).
+    """
+    lengths = length(a)[..., None]
+    return np.divide(a, lengths, out=np.zeros_like(a), where=lengths != 0)
+
+
+def face_normals(vertices, faces):
+    """
+    Unit normals of triangles given as indices into a vertex array.
+    :param vertices: (V, 3) vertex positions.
+    :param faces: (F, 3) integer vertex indices per triangle.
+    :return: (F, 3) array of normals, (v1 - v0) x (v2 - v0) normalized.
+    """
+    v0 = vertices[faces[:, 0]]
+    edge1 = sub(vertices[faces[:, 1]], v0)
+    edge2 = sub(vertices[faces[:, 2]], v0)
+    return normalize(cross(edge1, edge2))
+
+
+def transform_batch(points, matrix):
+    """
+    Apply a 4x4 transformation matrix to every row of a point array.
+    :param points: (N, 3) point positions.
+    :param matrix: 4x4 transformation matrix (list of lists or numpy array).
+    :return: (N, 3) array of transformed points.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
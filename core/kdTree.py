@@ -3,201 +3,319 @@ KD-Tree implementation for efficient ray-object intersection in 3D space
 """
 
 import numpy as np
-from core.vector import Vector
-from core.point import Point
+from numba import njit, prange
+from core import fastvec, cudaTraversal
+from core.ray import Ray
+from objects.polygon import Polygon, moller_trumbore
+from objects.triangleMesh import TriangleMesh
+
+# fastmath without the 'nnan'/'ninf' flags: the slab test relies on infinite inverse directions
+FASTMATH = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+# One record per flattened node, leaves have axis -1
+NODE_DTYPE = np.dtype([('left', np.int32), ('right', np.int32), ('axis', np.int8), ('obj_start', np.int32),
+                       ('obj_count', np.int32), ('bounds', np.float32, (2, 3))], align=True)
+
+# float32 values per triangle record, 16 * 4 bytes fill one cache line
+TRIANGLE_STRIDE = 16
+
+# Rays per parallel chunk of _traverse_batch, each chunk allocates its traversal scratch buffers once
+BATCH_CHUNK = 64
+
+
+def _aligned_rows(rows, stride, alignment=64):
+    """
+    Allocate a zeroed (rows, stride) float32 array whose data starts on an alignment-byte boundary.
+    :return: C-contiguous array view into a slightly larger buffer.
+    """
+    buffer = np.zeros(rows * stride + alignment // 4, dtype=np.float32)
+    offset = (-buffer.ctypes.data % alignment) // 4
+    return buffer[offset:offset + rows * stride].reshape(rows, stride)
 
 
 class KDNode:
-    __slots__ = ('axis', 'left', 'right', 'bounds', 'objects', 'objects_with_bounds')
+    __slots__ = ('axis', 'left', 'right', 'bounds', 'indices')
 
-    def __init__(self, objects, depth=0, max_objects=4, max_depth=20, use_sah=False):
-        self.axis = depth % 3
+    def __init__(self, bounds_min, bounds_max, indices, depth=0, max_objects=4, max_depth=20, use_sah=False):
+        """
+        Build a node over a subset of the tree's primitives.
+        :param bounds_min: (N, 3) array with the minimum corner of every primitive's bounding box.
+        :param bounds_max: (N, 3) array with the maximum corner of every primitive's bounding box.
+        :param indices: Array of indices of the primitives contained in this node.
+        """
+        self.axis = 0
         self.left = None
         self.right = None
+        self.indices = None
 
-        # Cache object bounds upfront
-        self.objects_with_bounds = [(obj, obj.get_bounds()) for obj in objects]
-        valid_objects = [obj for obj, bounds in self.objects_with_bounds if bounds]
-
-        self.bounds = self._compute_bounds_fast(valid_objects)
+        self.bounds = self._compute_bounds_fast(bounds_min, bounds_max, indices)
 
         # Stop recursion if max_depth reached or few objects remain
-        if len(valid_objects) <= max_objects or depth >= max_depth:
-            self.objects = valid_objects
+        if len(indices) <= max_objects or depth >= max_depth:
+            self.indices = indices
             return
 
+        # Split along the axis where the object centers are spread the widest
+        all_centers = 0.5 * (bounds_min[indices] + bounds_max[indices])
+        self.axis = int(np.argmax(all_centers.max(axis=0) - all_centers.min(axis=0)))
+
         # Choose split strategy
+        centers = all_centers[:, self.axis]
         if use_sah:
-            split_pos = self._find_best_split_sah(valid_objects, self.axis)
+            split_pos = self._find_best_split_sah(bounds_min, bounds_max, indices, self.axis)
         else:
-            split_pos = self._fast_median(valid_objects, self.axis)
+            split_pos = self._fast_median(centers)
 
         # Divide objects into left and right children
-        left_objs = []
-        right_objs = []
-
-        for obj, bounds in self.objects_with_bounds:
-            if bounds:
-                center = self._get_center(bounds, self.axis)
-                if center < split_pos:
-                    left_objs.append(obj)
-                else:
-                    right_objs.append(obj)
+        left_mask = centers < split_pos
+        left_indices = indices[left_mask]
+        right_indices = indices[~left_mask]
 
         # Only create child nodes if the division is effective
-        if left_objs and right_objs:
-            self.left = KDNode(left_objs, depth + 1, max_objects, max_depth, use_sah)
-            self.right = KDNode(right_objs, depth + 1, max_objects, max_depth, use_sah)
-            self.objects = []  # Clear objects list to save memory
+        if len(left_indices) and len(right_indices):
+            self.left = KDNode(bounds_min, bounds_max, left_indices, depth + 1, max_objects, max_depth, use_sah)
+            self.right = KDNode(bounds_min, bounds_max, right_indices, depth + 1, max_objects, max_depth, use_sah)
         else:
             # Division failed or skewed, make this a leaf node
-            self.objects = valid_objects
+            self.indices = indices
 
     @staticmethod
-    def _compute_surface_area(bounds):
-        """Compute surface area of a bounding box"""
-        min_p, max_p = bounds
-        dx = max_p.x - min_p.x
-        dy = max_p.y - min_p.y
-        dz = max_p.z - min_p.z
+    def _compute_surface_area(bounds_min, bounds_max):
+        """Compute surface areas of bounding boxes given as (..., 3) arrays of min and max corners"""
+        d = bounds_max - bounds_min
+        dx, dy, dz = d[..., 0], d[..., 1], d[..., 2]
         return 2 * (dx * dy + dx * dz + dy * dz)
 
-    def _fast_median(self, axis):
-        """Calculate median without numpy for small arrays"""
-        centers = []
-        for obj, bounds in [(o, b) for o, b in self.objects_with_bounds if b]:
-            centers.append(self._get_center(bounds, axis))
-
+    @staticmethod
+    def _fast_median(centers):
+        """Calculate the median of the object centers, the upper middle element for small arrays"""
         if len(centers) <= 10:
-            sorted_centers = sorted(centers)
-            return sorted_centers[len(sorted_centers) // 2]
+            return float(np.sort(centers)[len(centers) // 2])
         else:
             return float(np.median(centers))
 
-    def _find_best_split_sah(self, objects, axis):
-        """Find split position using Surface Area Heuristic"""
+    def _find_best_split_sah(self, bounds_min, bounds_max, indices, axis):
+        """
+        Find split position using Surface Area Heuristic.
+        Bounds of every candidate left/right partition come from prefix and suffix min/max scans
+        over the objects sorted by center, so all split positions are scored in O(N).
+        """
         # Sort objects by their center along the axis
-        sorted_objs = sorted(
-            [(obj, bounds) for obj, bounds in self.objects_with_bounds if bounds],
-            key=lambda x: self._get_center(x[1], axis)
-        )
-
-        best_cost = float('inf')
-        best_split = None
-
-        # Evaluate multiple split positions
-        for i in range(1, len(sorted_objs)):
-            left = [x[0] for x in sorted_objs[:i]]
-            right = [x[0] for x in sorted_objs[i:]]
-
-            left_bounds = self._compute_bounds_fast(left)
-            right_bounds = self._compute_bounds_fast(right)
-
-            # Calculate SAH cost
-            left_area = self._compute_surface_area(left_bounds)
-            right_area = self._compute_surface_area(right_bounds)
-
-            cost = left_area * len(left) + right_area * len(right)
-
-            if cost < best_cost:
-                best_cost = cost
-                left_center = self._get_center(sorted_objs[i - 1][1], axis)
-                right_center = self._get_center(sorted_objs[i][1], axis)
-                best_split = (left_center + right_center) / 2
-
-        return best_split if best_split is not None else self._fast_median(objects, axis)
+        centers = self._get_centers(bounds_min, bounds_max, indices, axis)
+        order = np.argsort(centers, kind='stable')
+        sorted_centers = centers[order]
+        sorted_min = bounds_min[indices[order]]
+        sorted_max = bounds_max[indices[order]]
+
+        n = len(indices)
+        if n < 2:
+            return self._fast_median(centers)
+
+        # Split k puts the first k sorted objects left and the remaining n - k right
+        left_min = np.minimum.accumulate(sorted_min, axis=0)[:-1]
+        left_max = np.maximum.accumulate(sorted_max, axis=0)[:-1]
+        right_min = np.minimum.accumulate(sorted_min[::-1], axis=0)[::-1][1:]
+        right_max = np.maximum.accumulate(sorted_max[::-1], axis=0)[::-1][1:]
+
+        # Calculate SAH cost of every split
+        k = np.arange(1, n)
+        cost = (self._compute_surface_area(left_min, left_max) * k +
+                self._compute_surface_area(right_min, right_max) * (n - k))
+
+        best = int(np.argmin(cost)) + 1
+        return float((sorted_centers[best - 1] + sorted_centers[best]) / 2)
 
     @staticmethod
-    def _get_center(bounds, axis):
+    def _get_centers(bounds_min, bounds_max, indices, axis):
         """
-        Get the center coordinate of the bounding box along the specified axis.
-        :param bounds: Bounding box defined by two points (min_bound, max_bound).
+        Get the center coordinates of the objects' bounding boxes along the specified axis.
+        :param bounds_min: (N, 3) array of minimum bounds of all objects.
+        :param bounds_max: (N, 3) array of maximum bounds of all objects.
+        :param indices: Indices of the objects to compute centers for.
         :param axis: Axis along which to compute the center (0 for x, 1 for y, 2 for z).
-        :return: Center coordinate along the specified axis.
+        :return: Array of center coordinates along the specified axis.
         """
-        min_bound, max_bound = bounds
-        if axis == 0:
-            return (min_bound.x + max_bound.x) / 2
-        elif axis == 1:
-            return (min_bound.y + max_bound.y) / 2
-        else:  # axis == 2
-            return (min_bound.z + max_bound.z) / 2
+        return 0.5 * (bounds_min[indices, axis] + bounds_max[indices, axis])
 
     @staticmethod
-    def _compute_bounds_fast(objects):
+    def _compute_bounds_fast(bounds_min, bounds_max, indices):
         """
         Compute the bounding box that contains all objects.
-        :param objects: List of objects to compute bounds for.
-        :return: Tuple of two Points representing the minimum and maximum bounds.
+        :param bounds_min: (N, 3) array of minimum bounds of all objects.
+        :param bounds_max: (N, 3) array of maximum bounds of all objects.
+        :param indices: Indices of the objects to compute bounds for.
+        :return: (2, 3) float32 array, the minimum and maximum bounds.
         """
-        if not objects:
-            return Point(0, 0, 0), Point(0, 0, 0)
+        if len(indices) == 0:
+            return np.zeros((2, 3), dtype=np.float32)
 
-        # Initialize with extreme values
-        min_x = min_y = min_z = float('inf')
-        max_x = max_y = max_z = float('-inf')
+        min_b = bounds_min[indices].min(axis=0)
+        max_b = bounds_max[indices].max(axis=0)
 
-        # Find min and max bounds for all objects
-        for obj in objects:
-            bounds = obj.get_bounds()
-            if bounds:
-                min_bound, max_bound = bounds
-                min_x = min(min_x, min_bound.x)
-                min_y = min(min_y, min_bound.y)
-                min_z = min(min_z, min_bound.z)
-                max_x = max(max_x, max_bound.x)
-                max_y = max(max_y, max_bound.y)
-                max_z = max(max_z, max_bound.z)
-
-        # Handle case with no valid bounds
-        if min_x == float('inf'):
-            return Point(0, 0, 0), Point(0, 0, 0)
-
-        return Point(min_x, min_y, min_z), Point(max_x, max_y, max_z)
-
-    def intersect_ray(self, ray):
-        """
-        Check if a ray intersects the bounding box of this node.
-        :param ray: Ray object with origin and direction attributes.
-        :return: True if the ray intersects the bounding box, False otherwise.
-        """
-        bounds_min, bounds_max = self.bounds
-        origin = ray.origin
-        direction = ray.direction
-
-        # Calculate inverse direction components (handle zeros)
-        inv_dir_x = 1.0 / direction.x if direction.x != 0 else float('inf')
-        inv_dir_y = 1.0 / direction.y if direction.y != 0 else float('inf')
-        inv_dir_z = 1.0 / direction.z if direction.z != 0 else float('inf')
-
-        # Calculate t values for each slab
-        t1_x = (bounds_min.x - origin.x) * inv_dir_x
-        t2_x = (bounds_max.x - origin.x) * inv_dir_x
-        t1_y = (bounds_min.y - origin.y) * inv_dir_y
-        t2_y = (bounds_max.y - origin.y) * inv_dir_y
-        t1_z = (bounds_min.z - origin.z) * inv_dir_z
-        t2_z = (bounds_max.z - origin.z) * inv_dir_z
-
-        # Swap if necessary
-        if inv_dir_x < 0:
-            t1_x, t2_x = t2_x, t1_x
-        if inv_dir_y < 0:
-            t1_y, t2_y = t2_y, t1_y
-        if inv_dir_z < 0:
-            t1_z, t2_z = t2_z, t1_z
-
-        # Find entry and exit points
-        tmin = max(max(t1_x, t1_y), t1_z)
-        tmax = min(min(t2_x, t2_y), t2_z)
-
-        return tmax > max(tmin, 0.0)
+        # Round outwards so the float32 box still contains every object
+        min_32 = min_b.astype(np.float32)
+        max_32 = max_b.astype(np.float32)
+        min_32 = np.where(min_32 > min_b, np.nextafter(min_32, np.float32(-np.inf)), min_32)
+        max_32 = np.where(max_32 < max_b, np.nextafter(max_32, np.float32(np.inf)), max_32)
+        return np.stack((min_32, max_32))
 
 
 class KDTree:
-    __slots__ = ('root',)  # Memory optimization
+    __slots__ = ('root', 'primitives', 'faces', 'depth', 'nodes', 'is_triangle', 'surfaces', 'triangles',
+                 'use_gpu', '_surface_index', '_gathered', '_device_tree', '_stack', '_stack_t', '_candidates',
+                 '_hit_index', '_hit_tbg')
 
-    def __init__(self, objects, max_objects=4, max_depth=20, use_sah=False):
-        self.root = KDNode(objects, max_objects=max_objects, max_depth=max_depth, use_sah=use_sah) if objects else None
+    def __init__(self, objects, max_objects=4, max_depth=20, use_sah=False, use_gpu=True):
+        """
+        :param objects: Objects to build the tree over.
+        :param use_gpu: Run intersect_batch on a CUDA device if one is available.
+        """
+        self.use_gpu = use_gpu
+        self._surface_index = {}
+        self._gathered = self._gather(objects)
+        bounds_min, bounds_max = self._gathered[-2:]
+
+        self.root = None
+        if len(bounds_min):
+            self.root = KDNode(bounds_min, bounds_max, np.arange(len(bounds_min)),
+                               max_objects=max_objects, max_depth=max_depth, use_sah=use_sah)
+        self.compile()
+
+    def _gather(self, objects):
+        """
+        Collect the primitives of all objects with their bounds and triangle data.
+        A TriangleMesh contributes one primitive per face, composite objects (e.g. Cuboid) one per object of
+        iter_primitives(), every other object is a single primitive; objects without bounds are left out of the tree.
+        Every primitive gets a surface id, shared by the primitives of a composite object, that ray.space skips.
+        :param objects: Objects to build the tree over.
+        :return: Tuple (owners, faces, surfaces, is_triangle, records, bounds_min, bounds_max) with one entry per
+                 primitive; faces is the face index into the owning mesh, -1 for other objects, and records holds
+                 v0, edge1, edge2 and the normal of triangles as (N, 12) rows.
+        """
+        owners = []
+        faces, surfaces, is_triangle, records, bounds_min, bounds_max = [], [], [], [], [], []
+        no_triangle = np.zeros((1, 12))
+        next_surface = 0
+        for obj in objects:
+            if isinstance(obj, TriangleMesh):
+                count = len(obj.faces)
+                owners.extend([obj] * count)
+                faces.append(np.arange(count, dtype=np.int32))
+                surfaces.append(np.arange(next_surface, next_surface + count, dtype=np.int32))
+                is_triangle.append(np.ones(count, dtype=np.bool_))
+                records.append(np.hstack(obj.triangle_arrays() + (obj.normals,)))
+                mins, maxs = obj.face_bounds()
+                bounds_min.append(mins)
+                bounds_max.append(maxs)
+                self._surface_index[obj.object_id] = next_surface
+                next_surface += count
+                continue
+
+            parts = obj.iter_primitives() if hasattr(obj, 'iter_primitives') else [obj]
+            added = False
+            for part in parts:
+                bounds = part.get_bounds_np() if hasattr(part, 'get_bounds_np') else part.get_bounds()
+                if not bounds:
+                    continue
+                owners.append(part)
+                faces.append(np.full(1, -1, dtype=np.int32))
+                surfaces.append(np.full(1, next_surface, dtype=np.int32))
+                is_triangle.append(np.full(1, isinstance(part, Polygon)))
+                if isinstance(part, Polygon):
+                    verts = fastvec.from_points(part.vertices[:3])
+                    normal = fastvec.from_points([part.normal])
+                    records.append(np.hstack((verts[:1], fastvec.sub(verts[1:2], verts[:1]),
+                                              fastvec.sub(verts[2:3], verts[:1]), normal)))
+                else:
+                    records.append(no_triangle)
+                bounds_min.append(np.array([tuple(bounds[0])], dtype=np.float64))
+                bounds_max.append(np.array([tuple(bounds[1])], dtype=np.float64))
+                added = True
+            if added:
+                self._surface_index[obj.object_id] = next_surface
+                next_surface += 1
+
+        if not owners:
+            empty_ids = np.zeros(0, dtype=np.int32)
+            return (owners, empty_ids, empty_ids, np.zeros(0, dtype=np.bool_), np.zeros((0, 12)), np.zeros((0, 3)),
+                    np.zeros((0, 3)))
+        return (owners, np.concatenate(faces), np.concatenate(surfaces), np.concatenate(is_triangle),
+                np.concatenate(records), np.concatenate(bounds_min), np.concatenate(bounds_max))
+
+    def flatten(self):
+        """
+        Walk the built KDNode tree once and pack it into a structured array of NODE_DTYPE records in depth-first
+        order. Leaves have axis -1 and own the range [obj_start, obj_start + obj_count) of the returned order.
+        :return: Tuple (nodes, order, depth); order lists the primitive indices leaf by leaf.
+        """
+        records = []
+        order = []
+        depth = 0
+
+        # (node, index of the parent record and field to patch, depth)
+        stack = [(self.root, None, 0)] if self.root else []
+        while stack:
+            node, parent_slot, node_depth = stack.pop()
+            index = len(records)
+            if parent_slot is not None:
+                records[parent_slot[0]][parent_slot[1]] = index
+            depth = max(depth, node_depth)
+
+            is_leaf = node.indices is not None
+            records.append([-1, -1, -1 if is_leaf else node.axis, len(order),
+                            len(node.indices) if is_leaf else 0, node.bounds])
+            if is_leaf:
+                order.extend(node.indices.tolist())
+
+            if node.right:
+                stack.append((node.right, (index, 1), node_depth + 1))
+            if node.left:
+                stack.append((node.left, (index, 0), node_depth + 1))
+
+        nodes = np.empty(len(records), dtype=NODE_DTYPE)
+        for i, record in enumerate(records):
+            nodes[i] = tuple(record)
+        return nodes, np.array(order, dtype=np.int64), depth
+
+    def compile(self):
+        """
+        Flatten the KD-Tree into the node array and primitive arrays consumed by the compiled traversal.
+        The primitives of each leaf occupy the contiguous range [obj_start, obj_start + obj_count) of self.primitives.
+        Called by __init__ on the primitives gathered there, modified objects need a new KDTree (World.rebuild_tree).
+        :return: None
+        """
+        self.nodes, order, self.depth = self.flatten()
+
+        # Reorder the primitives leaf by leaf
+        owners, faces, surfaces, is_triangle, records = self._gathered[:5]
+        self.primitives = [owners[i] for i in order.tolist()]
+        self.faces = faces[order]
+        self.surfaces = surfaces[order]
+        self.is_triangle = is_triangle[order]
+
+        # One 64-byte row per triangle: v0 [0:3], edge1 [3:6], edge2 [6:9], normal [9:12], padding [12:16]
+        self.triangles = _aligned_rows(len(order), TRIANGLE_STRIDE)
+        self.triangles[:, :12] = records[order]
+        self._device_tree = None  # Copied to the GPU on the first batch
+
+        # Traversal scratch buffers reused by every intersect() call
+        self._stack = np.empty(self.depth + 2, dtype=np.int32)
+        self._stack_t = np.empty(self.depth + 2)
+        self._candidates = np.empty(len(order), dtype=np.int32)
+        self._hit_index = np.empty(len(order), dtype=np.int32)
+        self._hit_tbg = np.empty((len(order), 3))
+
+    def _skip_surface(self, space):
+        """
+        Surface id of a ray's space: an object, or a (mesh, face) tuple for a triangle of a TriangleMesh.
+        :return: Surface id, -1 if the space is not in the tree.
+        """
+        if space is None:
+            return -1
+        if isinstance(space, tuple):
+            base = self._surface_index.get(space[0].object_id)
+            return base + space[1] if base is not None else -1
+        return self._surface_index.get(space.object_id, -1)
 
     def intersect(self, ray):
         """
@@ -207,90 +325,311 @@ class KDTree:
         if not self.root:
             return None
 
-        closest_hit = None
-        min_dist = float('inf')
+        # The ray's cached floats are passed as tuples, cheaper for numba to unbox than arrays
+        t, index, beta, gamma, count = _traverse(
+            (ray._ox, ray._oy, ray._oz), (ray._dx, ray._dy, ray._dz), (ray._ix, ray._iy, ray._iz),
+            (ray._sx, ray._sy, ray._sz), self._skip_surface(ray.space),
+            self.nodes, self.is_triangle, self.surfaces, self.triangles, self._stack, self._stack_t, self._candidates)
 
-        # Stack-based KD-tree traversal: (node, estimated_distance)
-        nodes_to_visit = [(self.root, 0.0)]
+        closest_hit = self.hit_info(ray, index, t, beta, gamma) if index >= 0 else None
+        min_dist = t
 
-        while nodes_to_visit:
-            # Optional optimization: sort stack by estimated distance occasionally
-            if len(nodes_to_visit) > 8:
-                nodes_to_visit.sort(key=lambda x: x[1])
+        # Objects without a compiled intersection test, collected from the leaves the ray reached
+        for i in self._candidates[:count].tolist():
+            hit = self.primitives[i].intersect(ray)
+            if hit and 1e-4 < hit['t'] < min_dist:
+                closest_hit = hit
+                min_dist = hit['t']
 
-            current_node, est_dist = nodes_to_visit.pop(0)
-
-            # Skip node if all hits here would be farther than one we've already found
-            if est_dist > min_dist:
-                continue
-
-            # Bounding box check
-            if not current_node.intersect_ray(ray):
-                continue
-
-            # Leaf node: check each object
-            for obj in current_node.objects:
-                hit = obj.intersect(ray)
-                if not hit:
-                    continue
-
-                # Skip every hit on the object that spawned this ray
-                if ray.space is obj:
-                    continue
+        return closest_hit
 
-                # Otherwise, accept it if it’s the nearest so far
-                if 1e-4 < hit['t'] < min_dist:
-                    closest_hit = hit
-                    min_dist = hit['t']
+    def intersect_all(self, ray, max_dist=np.inf):
+        """
+        Find every intersection of a ray with the objects in the KD-Tree up to max_dist, in one traversal.
+        Objects without a compiled intersection test are intersected again from just past each of their hits,
+        so a ray through e.g. a sphere reports both the entry and the exit.
+        Skips intersecting the object stored in ray.space like intersect().
+        :param ray: Ray to trace.
+        :param max_dist: Hits farther along the ray are left out.
+        :return: List of hit dictionaries sorted by 't'.
+        """
+        if not self.root:
+            return []
 
-            else:
-                # Internal node: enqueue children
-                if current_node.left:
-                    left_dist = self._estimate_distance(ray, current_node.left.bounds)
-                    nodes_to_visit.append((current_node.left, left_dist))
+        count, n_candidates = _traverse_all(
+            (ray._ox, ray._oy, ray._oz), (ray._dx, ray._dy, ray._dz), (ray._ix, ray._iy, ray._iz),
+            (ray._sx, ray._sy, ray._sz), self._skip_surface(ray.space), float(max_dist),
+            self.nodes, self.is_triangle, self.surfaces, self.triangles, self._stack, self._hit_index, self._hit_tbg,
+            self._candidates)
 
-                if current_node.right:
-                    right_dist = self._estimate_distance(ray, current_node.right.bounds)
-                    nodes_to_visit.append((current_node.right, right_dist))
+        # Every primitive belongs to exactly one leaf, so none is reported twice
+        hits = [self.hit_info(ray, index, t, beta, gamma)
+                for index, (t, beta, gamma) in zip(self._hit_index[:count].tolist(), self._hit_tbg[:count].tolist())]
+        for i in self._candidates[:n_candidates].tolist():
+            hits.extend(_march(self.primitives[i], ray, max_dist))
 
-        return closest_hit
+        hits.sort(key=lambda hit: hit['t'])
+        return hits
 
-    @staticmethod
-    def _estimate_distance(ray, bounds):
+    def intersect_batch(self, origins, directions, spaces=None):
         """
-        Estimate the distance from the ray origin to the closest point on the bounding box.
-        :param ray: Ray object with origin and direction attributes.
-        :param bounds: Tuple of two Points representing the bounding box (min_bound, max_bound).
-        :return: Estimated distance to the closest point on the bounding box.
+        Find the closest triangle hit for a whole batch of rays in one compiled call,
+        on the GPU if use_gpu is set and a CUDA device is available, otherwise on all CPU cores.
+        Rays whose traversal reached objects without a compiled intersection test are flagged as pending
+        and should be traced with intersect().
+        :param origins: (N, 3) float64 array of ray origins.
+        :param directions: (N, 3) float64 array of normalized ray directions.
+        :param spaces: Optional list of ray spaces (see Ray.space) skipped per ray, such batches run on the CPU.
+        :return: Tuple of arrays (t, index, beta, gamma, pending); index is -1 where no triangle was hit.
+        """
+        n = len(directions)
+        if not self.root:
+            return (np.full(n, np.inf), np.full(n, -1, dtype=np.int32), np.zeros(n), np.zeros(n),
+                    np.zeros(n, dtype=np.bool_))
+
+        directions = np.ascontiguousarray(directions, dtype=np.float64)
+        with np.errstate(divide='ignore'):
+            inv_dirs = np.where(directions == 0, np.inf, 1.0 / directions)
+        signs = (inv_dirs < 0).astype(np.int8)
+
+        if (spaces is None and self.use_gpu and self.depth + 2 <= cudaTraversal.STACK_SIZE
+                and cudaTraversal.available()):
+            if self._device_tree is None:
+                self._device_tree = cudaTraversal.to_device(self.nodes, self.is_triangle, self.triangles)
+            return cudaTraversal.traverse_batch(origins, directions, inv_dirs, signs, self._device_tree)
+
+        skips = (np.full(n, -1, dtype=np.int32) if spaces is None
+                 else np.array([self._skip_surface(space) for space in spaces], dtype=np.int32))
+        return _traverse_batch(
+            np.ascontiguousarray(origins, dtype=np.float64), directions, inv_dirs, signs, skips,
+            self.depth + 2, self.nodes, self.is_triangle, self.surfaces, self.triangles)
+
+    def hit_info(self, ray, index, t, beta, gamma):
         """
-        bounds_min, bounds_max = bounds
-
-        # For rays starting inside the box
-        if (bounds_min.x <= ray.origin.x <= bounds_max.x and
-                bounds_min.y <= ray.origin.y <= bounds_max.y and
-                bounds_min.z <= ray.origin.z <= bounds_max.z):
-            return 0.0
-
-        # Find the closest point on the box to the ray origin
-        closest_x = max(bounds_min.x, min(ray.origin.x, bounds_max.x))
-        closest_y = max(bounds_min.y, min(ray.origin.y, bounds_max.y))
-        closest_z = max(bounds_min.z, min(ray.origin.z, bounds_max.z))
-
-        # Calculate squared distance to this point
-        dx = ray.origin.x - closest_x
-        dy = ray.origin.y - closest_y
-        dz = ray.origin.z - closest_z
-
-        # Only consider distance in the ray direction
-        sqr_dist = dx * dx + dy * dy + dz * dz
-        if sqr_dist == 0:
-            return 0.0
-
-        # Project the distance vector onto the ray direction
-        to_closest = Vector(closest_x - ray.origin.x,
-                            closest_y - ray.origin.y,
-                            closest_z - ray.origin.z)
-        proj = to_closest.dot(ray.direction)
-
-        # If projection is negative, the box is behind the ray
-        return max(0.0, proj)
+        Build the hit dictionary for a triangle found by the compiled traversal.
+        :param ray: Ray that hit the triangle.
+        :param index: Index of the triangle in self.primitives.
+        :param t: Distance along the ray.
+        :param beta: Barycentric weight of the second vertex.
+        :param gamma: Barycentric weight of the third vertex.
+        :return: Hit dictionary as returned by Polygon.intersect or TriangleMesh.intersect.
+        """
+        face = self.faces[index]
+        if face >= 0:
+            return self.primitives[index].hit_info(ray, face, float(t), float(beta), float(gamma))
+        return self.primitives[index].hit_info(ray, float(t), float(beta), float(gamma))
+
+
+def _march(obj, ray, max_dist, eps=1e-4):
+    """
+    All hits of a ray with one object up to max_dist, intersecting again from just past every hit.
+    :return: List of hit dictionaries, 't' and 'distance' are measured from the origin of ray.
+    """
+    hits = []
+    offset = 0.0
+    probe = ray
+    while True:
+        hit = obj.intersect(probe)
+        if not hit or offset + hit['t'] > max_dist:
+            return hits
+        offset += hit['t']
+        if offset > 1e-4:
+            hit['t'] = hit['distance'] = offset
+            hits.append(hit)
+        offset += eps
+        probe = Ray(ray.origin + ray.direction * offset, ray.direction, space=ray.space, normalize=False)
+
+
+@njit(nogil=True, fastmath=FASTMATH, cache=True, inline='always')
+def _slab(nodes, node, ox, oy, oz, inv_x, inv_y, inv_z, sx, sy, sz):
+    """
+    Slab test of a ray against a node's bounding box, the sign bits select the entry and exit corner per axis.
+    :return: Tuple (entry, exit) of distances along the ray, entry is clamped to 0; the box is hit if exit >= entry
+    (flat boxes of axis-aligned triangles have exit == entry).
+    """
+    bounds = nodes[node].bounds
+    tmin = (bounds[sx, 0] - ox) * inv_x
+    tmax = (bounds[1 - sx, 0] - ox) * inv_x
+    tmin = max(tmin, (bounds[sy, 1] - oy) * inv_y)
+    tmax = min(tmax, (bounds[1 - sy, 1] - oy) * inv_y)
+    tmin = max(tmin, (bounds[sz, 2] - oz) * inv_z)
+    tmax = min(tmax, (bounds[1 - sz, 2] - oz) * inv_z)
+    return max(tmin, 0.0), tmax
+
+
+@njit(nogil=True, fastmath=FASTMATH, cache=True)
+def _traverse(origin, direction, inv_dir, sign, skip, nodes, is_triangle, surfaces, triangles,
+              stack, stack_t, candidates):
+    """
+    Compiled depth-first traversal of the flattened KD-Tree.
+    Triangles are intersected in place; other primitives of the visited leaves are written to candidates.
+    Primitives whose surface id equals skip are ignored.
+    stack, stack_t (tree depth + 2) and candidates (one slot per primitive) are caller-owned scratch buffers.
+    :return: Tuple (t, index, beta, gamma, count) for the closest triangle, index is -1 on a miss;
+             the first count entries of candidates are set.
+    """
+    ox, oy, oz = origin[0], origin[1], origin[2]
+    dx, dy, dz = direction[0], direction[1], direction[2]
+    inv_x, inv_y, inv_z = inv_dir[0], inv_dir[1], inv_dir[2]
+    sx, sy, sz = sign[0], sign[1], sign[2]
+
+    best_t = np.inf
+    best_index = -1
+    best_beta = 0.0
+    best_gamma = 0.0
+    n_candidates = 0
+
+    # LIFO stack of nodes to visit along with their entry distance
+    top = 0
+    if nodes.shape[0] > 0:
+        entry, exit_ = _slab(nodes, 0, ox, oy, oz, inv_x, inv_y, inv_z, sx, sy, sz)
+        if exit_ >= entry:
+            stack[0] = 0
+            stack_t[0] = entry
+            top = 1
+
+    while top > 0:
+        top -= 1
+        node = stack[top]
+
+        # Every hit here would be farther than one found since the node was pushed
+        if stack_t[top] > best_t:
+            continue
+
+        record = nodes[node]
+        if record.axis < 0:
+            start = record.obj_start
+            for i in range(start, start + record.obj_count):
+                if surfaces[i] == skip:
+                    continue
+                if not is_triangle[i]:
+                    candidates[n_candidates] = i
+                    n_candidates += 1
+                    continue
+
+                t, beta, gamma = moller_trumbore(
+                    triangles[i, 0], triangles[i, 1], triangles[i, 2],
+                    triangles[i, 3], triangles[i, 4], triangles[i, 5],
+                    triangles[i, 6], triangles[i, 7], triangles[i, 8],
+                    ox, oy, oz, dx, dy, dz)
+                if 1e-4 < t < best_t:
+                    best_t = t
+                    best_index = i
+                    best_beta = beta
+                    best_gamma = gamma
+            continue
+
+        # Internal node: only push children whose box is hit closer than the best hit so far,
+        # the farther one first so the nearer one is visited next
+        near = record.left
+        near_t, exit_ = _slab(nodes, near, ox, oy, oz, inv_x, inv_y, inv_z, sx, sy, sz)
+        near_hit = exit_ >= near_t and near_t <= best_t
+        far = record.right
+        far_t, exit_ = _slab(nodes, far, ox, oy, oz, inv_x, inv_y, inv_z, sx, sy, sz)
+        far_hit = exit_ >= far_t and far_t <= best_t
+        if far_t < near_t:
+            near, far = far, near
+            near_t, far_t = far_t, near_t
+            near_hit, far_hit = far_hit, near_hit
+
+        if far_hit:
+            stack[top] = far
+            stack_t[top] = far_t
+            top += 1
+        if near_hit:
+            stack[top] = near
+            stack_t[top] = near_t
+            top += 1
+
+    return best_t, best_index, best_beta, best_gamma, n_candidates
+
+
+@njit(nogil=True, fastmath=FASTMATH, cache=True)
+def _traverse_all(origin, direction, inv_dir, sign, skip, max_dist, nodes, is_triangle, surfaces, triangles,
+                  stack, hit_index, hit_tbg, candidates):
+    """
+    Compiled traversal collecting every triangle hit up to max_dist instead of the closest one.
+    Other primitives of the visited leaves are written to candidates, primitives whose surface id equals skip
+    are ignored.
+    stack (tree depth + 2), hit_index, hit_tbg and candidates (one slot per primitive) are caller-owned buffers.
+    :return: Tuple (count, n_candidates); hit_index[:count] and the (t, beta, gamma) rows hit_tbg[:count] are set,
+             as are the first n_candidates entries of candidates.
+    """
+    ox, oy, oz = origin[0], origin[1], origin[2]
+    dx, dy, dz = direction[0], direction[1], direction[2]
+    inv_x, inv_y, inv_z = inv_dir[0], inv_dir[1], inv_dir[2]
+    sx, sy, sz = sign[0], sign[1], sign[2]
+
+    count = 0
+    n_candidates = 0
+
+    # Every node whose box the ray enters before max_dist is visited, in no particular order
+    top = 0
+    if nodes.shape[0] > 0:
+        entry, exit_ = _slab(nodes, 0, ox, oy, oz, inv_x, inv_y, inv_z, sx, sy, sz)
+        if exit_ >= entry and entry <= max_dist:
+            stack[0] = 0
+            top = 1
+
+    while top > 0:
+        top -= 1
+        record = nodes[stack[top]]
+        if record.axis < 0:
+            start = record.obj_start
+            for i in range(start, start + record.obj_count):
+                if surfaces[i] == skip:
+                    continue
+                if not is_triangle[i]:
+                    candidates[n_candidates] = i
+                    n_candidates += 1
+                    continue
+
+                t, beta, gamma = moller_trumbore(
+                    triangles[i, 0], triangles[i, 1], triangles[i, 2],
+                    triangles[i, 3], triangles[i, 4], triangles[i, 5],
+                    triangles[i, 6], triangles[i, 7], triangles[i, 8],
+                    ox, oy, oz, dx, dy, dz)
+                if 1e-4 < t <= max_dist:
+                    hit_index[count] = i
+                    hit_tbg[count, 0] = t
+                    hit_tbg[count, 1] = beta
+                    hit_tbg[count, 2] = gamma
+                    count += 1
+            continue
+
+        for child in (record.left, record.right):
+            entry, exit_ = _slab(nodes, child, ox, oy, oz, inv_x, inv_y, inv_z, sx, sy, sz)
+            if exit_ >= entry and entry <= max_dist:
+                stack[top] = child
+                top += 1
+
+    return count, n_candidates
+
+
+@njit(parallel=True, nogil=True, fastmath=FASTMATH, cache=True)
+def _traverse_batch(origins, directions, inv_dirs, signs, skips, stack_size, nodes, is_triangle, surfaces,
+                    triangles):
+    """
+    Run the compiled traversal for every ray of a batch, rays are independent and spread over all cores
+    in chunks of BATCH_CHUNK rays that share scratch buffers.
+    :param skips: Surface id skipped per ray, -1 for none.
+    :return: Tuple of arrays (t, index, beta, gamma, pending), see KDTree.intersect_batch.
+    """
+    n = origins.shape[0]
+    t = np.empty(n)
+    index = np.empty(n, dtype=np.int32)
+    beta = np.empty(n)
+    gamma = np.empty(n)
+    pending = np.empty(n, dtype=np.bool_)
+
+    for chunk in prange((n + BATCH_CHUNK - 1) // BATCH_CHUNK):
+        stack = np.empty(stack_size, dtype=np.int32)
+        stack_t = np.empty(stack_size)
+        candidates = np.empty(is_triangle.shape[0], dtype=np.int32)
+        for i in range(chunk * BATCH_CHUNK, min(n, (chunk + 1) * BATCH_CHUNK)):
+            t[i], index[i], beta[i], gamma[i], count = _traverse(
+                origins[i], directions[i], inv_dirs[i], signs[i], skips[i], nodes, is_triangle, surfaces,
+                triangles, stack, stack_t, candidates)
+            pending[i] = count > 0
+
+    return t, index, beta, gamma, pending
@@ -1,11 +1,13 @@
 """
 Point has x,y,z coordinates and distance and transform methods.
 """
-import numpy as np
+from math import sqrt
 from core.vector import Vector
 
 
 class Point:
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x, y, z):
         self.x = x
         self.y = y
@@ -41,7 +43,7 @@ class Point:
         :param other: Point
         :return: float
         """
-        return np.sqrt((self.x - other.x)**2 + (self.y - other.y)**2 + (self.z - other.z)**2)
+        return sqrt((self.x - other.x)**2 + (self.y - other.y)**2 + (self.z - other.z)**2)
 
     def transform(self, matrix):
         """
@@ -4,9 +4,49 @@ Ray has an origin and direction
 
 
 class Ray:
-    def __init__(self, origin, direction, space=None):
+    # Rays are created for every bounce and shadow test, slots keep them small and skip the instance dict
+    __slots__ = ('_origin', '_ox', '_oy', '_oz',
+                 '_direction', '_dx', '_dy', '_dz', '_ix', '_iy', '_iz', '_sx', '_sy', '_sz',
+                 'space')
+
+    def __init__(self, origin, direction, space=None, normalize=True):
+        """
+        :param origin: Point
+        :param direction: Vector
+        :param space: The object that spawned this ray, skipped by intersection tests
+        :param normalize: Set to False if direction is already unit length
+        """
         self.origin = origin  # Origin of the ray (Point)
-        self.direction = direction.normalize()  # Direction of the ray (Vector)
+        self.direction = direction.normalize() if normalize else direction  # Direction of the ray (Vector)
         self.space = space  # The object that spawned this ray
 
+    @property
+    def origin(self):
+        return self._origin
+
+    @origin.setter
+    def origin(self, origin):
+        """
+        Set the origin and cache it as floats for the scalar intersection tests.
+        :param origin: Point
+        """
+        self._origin = origin
+        self._ox, self._oy, self._oz = float(origin.x), float(origin.y), float(origin.z)
+
+    @property
+    def direction(self):
+        return self._direction
 
+    @direction.setter
+    def direction(self, direction):
+        """
+        Set the direction and cache it, along with its inverse and sign bits, as floats for intersection and slab tests.
+        :param direction: Vector
+        """
+        self._direction = direction
+        self._dx, self._dy, self._dz = float(direction.x), float(direction.y), float(direction.z)
+        self._ix = 1.0 / self._dx if self._dx != 0 else float('inf')
+        self._iy = 1.0 / self._dy if self._dy != 0 else float('inf')
+        self._iz = 1.0 / self._dz if self._dz != 0 else float('inf')
+        # 1 where the ray runs towards -axis, selects the box corner the ray enters a slab through
+        self._sx, self._sy, self._sz = int(self._ix < 0), int(self._iy < 0), int(self._iz < 0)
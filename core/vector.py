@@ -2,10 +2,12 @@
 Vector class has x,y,z attributes, +, -, cross, dot, length, normalize, and transform methods.
 """
 
-import numpy as np
+from math import sqrt
 
 
 class Vector:
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x, y, z):
         self.x = x
         self.y = y
@@ -85,7 +87,7 @@ class Vector:
         Calculate the length (magnitude) of the vector.
         :return: A float representing the length of the vector.
         """
-        return np.sqrt(self.x**2 + self.y**2 + self.z**2)
+        return sqrt(self.x**2 + self.y**2 + self.z**2)
 
     def normalize(self):
         """
@@ -103,8 +105,11 @@ class Vector:
         :param matrix: A 4x4 transformation matrix (as a list of lists or numpy array).
         :return: A new Vector instance representing the transformed vector.
         """
-        # Apply transformation matrix to the vector
-        pass  # Implement matrix transformation logic
+        # Directions are not translated, only the upper 3x3 part of the matrix applies
+        x = self.x * matrix[0][0] + self.y * matrix[0][1] + self.z * matrix[0][2]
+        y = self.x * matrix[1][0] + self.y * matrix[1][1] + self.z * matrix[1][2]
+        z = self.x * matrix[2][0] + self.y * matrix[2][1] + self.z * matrix[2][2]
+        return Vector(x, y, z)
 
     def to_tuple(self):
         """
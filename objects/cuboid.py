@@ -1,8 +1,10 @@
 """
 A class representing a 3D cuboid object with methods for intersection, transformation, and bounding box calculation.
 """
+import numpy as np
 from objects.object import Object
 from objects.polygon import Polygon
+from core import fastvec
 from core.vector import Vector
 from core.point import Point
 
@@ -20,6 +22,10 @@ class Cuboid(Object):
         self.kt = kt
         self.triangles = self.create_cuboid()
 
+        # Half extents never change, bounds are cached until the cuboid is transformed
+        self._half_extents = np.array([width / 2, height / 2, depth / 2])
+        self._bounds_np = None
+
     def create_cuboid(self):
         """
         Create the triangles that make up the cuboid.
@@ -69,8 +75,18 @@ class Cuboid(Object):
             )
             triangles.extend([tri1, tri2])
 
+        for triangle in triangles:
+            triangle.parent = self
         return triangles
 
+    def iter_primitives(self):
+        """
+        The triangles of the cuboid, added to the KD-tree individually instead of the cuboid as a whole.
+        Their hits report the cuboid as the object that was hit.
+        :return: List of Polygon objects.
+        """
+        return self.triangles
+
     def intersect(self, ray):
         """
         Check if the ray intersects with the cuboid.
@@ -79,19 +95,10 @@ class Cuboid(Object):
         """
         closest_hit = None
         for triangle in self.triangles:
+            # The triangles report the cuboid as the hit object
             hit = triangle.intersect(ray)
             if hit and (closest_hit is None or hit['t'] < closest_hit['t']):
-                # Copy the polygon’s hit but *override* all the fields
-                closest_hit = {
-                    't': hit['t'],
-                    'distance': hit.get('distance', hit['t']),
-                    'object': self,
-                    'hit_point': hit['hit_point'],
-                    'uv': hit['uv'],
-                    'normal': hit['normal'],
-                    'material': self.material,
-                    'illumination_model': self.illumination_model
-                }
+                closest_hit = hit
 
         return closest_hit
 
@@ -102,21 +109,42 @@ class Cuboid(Object):
         :return: None
         """
         self.center = self.center.transform(matrix)
-        for triangle in self.triangles:
-            triangle.transform(matrix)
+
+        # Transform the vertices and normals of all triangles at once
+        vertices = fastvec.from_points([v for triangle in self.triangles for v in triangle.vertices])
+        vertices = fastvec.transform_batch(vertices, matrix).reshape(-1, 3, 3)
+        normal_matrix = np.linalg.inv(np.asarray(matrix, dtype=np.float64)[:3, :3]).T
+        normals = fastvec.from_points([triangle.normal for triangle in self.triangles])
+        normals = fastvec.normalize(normals @ normal_matrix.T)
+
+        for triangle, verts, normal in zip(self.triangles, vertices.tolist(), normals.tolist()):
+            triangle.vertices = [Point(*v) for v in verts]
+            triangle.normal = Vector(*normal)
+            triangle.invalidate_bounds()
         self.invalidate_bounds()  # Critical for KD-tree updates
 
-    def get_bounds(self):
+    def invalidate_bounds(self):
         """
-        Calculate the axis-aligned bounding box of the cuboid.
-        :return: A tuple of two Points representing the minimum and maximum corners of the bounding box.
+        Invalidate the cached bounds of the cuboid, both the Point and the array form.
+        :return: None
         """
-        min_x = self.center.x - self.width / 2
-        max_x = self.center.x + self.width / 2
-        min_y = self.center.y - self.height / 2
-        max_y = self.center.y + self.height / 2
-        min_z = self.center.z - self.depth / 2
-        max_z = self.center.z + self.depth / 2
+        super().invalidate_bounds()
+        self._bounds_np = None
 
-        return Point(min_x, min_y, min_z), Point(max_x, max_y, max_z)
+    def get_bounds_np(self):
+        """
+        Axis-aligned bounding box of the cuboid as arrays, computed once and cached.
+        :return: A tuple of two numpy arrays of shape (3,), the minimum and maximum corners.
+        """
+        if self._bounds_np is None:
+            center = np.array([self.center.x, self.center.y, self.center.z], dtype=np.float64)
+            self._bounds_np = (center - self._half_extents, center + self._half_extents)
+        return self._bounds_np
 
+    def _compute_bounds(self):
+        """
+        Calculate the axis-aligned bounding box of the cuboid.
+        :return: A tuple of two Points representing the minimum and maximum corners of the bounding box.
+        """
+        min_p, max_p = self.get_bounds_np()
+        return Point(*min_p.tolist()), Point(*max_p.tolist())
@@ -2,7 +2,6 @@
 Cylinder object for ray tracing.
 """
 
-import numpy as np
 import math
 from core.ray import Ray
 from core.point import Point
@@ -26,14 +25,8 @@ class Cylinder(Object):
         self.kr, self.kt = kr, kt
         self.half_h = height / 2
 
-        # Rotate cylinder from Y-axis to Z-axis (90° around X-axis)
-        angle = math.radians(90)
-        self.rotation_matrix = np.array([
-            [1, 0, 0],
-            [0, math.cos(angle), -math.sin(angle)],
-            [0, math.sin(angle), math.cos(angle)],
-        ])
-        self.inv_rotation_matrix = np.linalg.inv(self.rotation_matrix)
+        # The cylinder is rotated from the Y-axis to the Z-axis (90° around X-axis), a fixed rotation that
+        # reduces to swapping axes: world (x, y, z) -> local (x, z, -y) and local (x, y, z) -> world (x, -z, y)
 
     def intersect(self, ray: Ray):
         """
@@ -42,18 +35,14 @@ class Cylinder(Object):
         :return: None if no intersection, otherwise a dictionary with t, object, normal, illumination_model, and material.
         """
 
-        # Transform ray into cylinder's local coordinate system
-        local_origin = ray.origin - self.center
-        local_direction = ray.direction
-
-        o = Point(*self.inv_rotation_matrix @ np.array([local_origin.x, local_origin.y, local_origin.z]))
-
-        d = Vector(*self.inv_rotation_matrix @ np.array([local_direction.x, local_direction.y, local_direction.z]))
+        # Transform ray into cylinder's local coordinate system, on scalar floats
+        ox, oy, oz = ray._ox - self.center.x, ray._oz - self.center.z, self.center.y - ray._oy
+        dx, dy, dz = ray._dx, ray._dz, -ray._dy
 
         # Intersect side surface (Y-axis aligned in local space)
-        a = d.x ** 2 + d.z ** 2
-        b = 2 * (o.x * d.x + o.z * d.z)
-        c = o.x ** 2 + o.z ** 2 - self.radius ** 2
+        a = dx ** 2 + dz ** 2
+        b = 2 * (ox * dx + oz * dz)
+        c = ox ** 2 + oz ** 2 - self.radius ** 2
 
         t_cyl = None
         disc = b ** 2 - 4 * a * c
@@ -62,20 +51,20 @@ class Cylinder(Object):
             for t in ((-b - sqrt_disc) / (2 * a), (-b + sqrt_disc) / (2 * a)):
                 if t <= 1e-4:
                     continue
-                y = o.y + d.y * t
+                y = oy + dy * t
                 if -self.half_h <= y <= self.half_h:
                     if t_cyl is None or t < t_cyl:
                         t_cyl = t
 
         # Intersect flat caps
         t_cap = None
-        if abs(d.y) > 1e-6:
+        if abs(dy) > 1e-6:
             for cap_sign in (-1, 1):
                 cap_y = cap_sign * self.half_h
-                t = (cap_y - o.y) / d.y
+                t = (cap_y - oy) / dy
                 if t > 1e-4:
-                    x = o.x + d.x * t
-                    z = o.z + d.z * t
+                    x = ox + dx * t
+                    z = oz + dz * t
                     if x ** 2 + z ** 2 <= self.radius ** 2:
                         if t_cap is None or t < t_cap:
                             t_cap = t
@@ -90,16 +79,18 @@ class Cylinder(Object):
             return None
 
         # Compute intersection point and local normal
-        hit_local = o + d * t_hit
+        hx, hy, hz = ox + dx * t_hit, oy + dy * t_hit, oz + dz * t_hit
 
         if t_cap is not None and t_hit == t_cap:
-            n_local = Vector(0, 1, 0 if hit_local.y > 0 else -1)
+            nx, ny, nz = 0.0, 1.0, 0.0 if hy > 0 else -1.0
         else:
-            n_local = Vector(hit_local.x, 0, hit_local.z).normalize()
+            length = math.sqrt(hx * hx + hz * hz)
+            nx, ny, nz = (hx / length, 0.0, hz / length) if length else (0.0, 0.0, 0.0)
 
         # Rotate back to world space
-        P_world = self.center + Vector(*self.rotation_matrix @ np.array([hit_local.x, hit_local.y, hit_local.z]))
-        n_world = Vector(*self.rotation_matrix @ np.array([n_local.x, n_local.y, n_local.z])).normalize()
+        nx, ny, nz = nx, -nz, ny
+        length = math.sqrt(nx * nx + ny * ny + nz * nz)
+        n_world = Vector(nx / length, ny / length, nz / length) if length else Vector(0, 0, 0)
 
         return {
             't': t_hit,
@@ -109,7 +100,7 @@ class Cylinder(Object):
             'material': self.material,
         }
 
-    def get_bounds(self):
+    def _compute_bounds(self):
         """
         Get the axis-aligned bounding box (AABB) of the cylinder.
         :return: A tuple of (min_point, max_point) representing the bounding box corners.
@@ -117,24 +108,7 @@ class Cylinder(Object):
 
         r = self.radius
         h = self.half_h
+        cx, cy, cz = self.center.x, self.center.y, self.center.z
 
-        # 8 corners in local (unrotated) space
-        local_corners = [
-            np.array([x, y, z], dtype=float)
-            for x in [-r, r]
-            for y in [-h, h]
-            for z in [-r, r]
-        ]
-
-        # Center as a numpy array
-        center_vec = np.array([self.center.x, self.center.y, self.center.z], dtype=float)
-
-        # Transform corners to world space
-        world_pts = [center_vec + self.rotation_matrix @ pt for pt in local_corners]
-        world_pts = np.array(world_pts)
-
-        min_p = Point(*world_pts.min(axis=0))
-        max_p = Point(*world_pts.max(axis=0))
-        return min_p, max_p
-
-
+        # The local Y-axis of the cylinder points along world Z
+        return Point(cx - r, cy - r, cz - h), Point(cx + r, cy + r, cz + h)
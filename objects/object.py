@@ -10,7 +10,7 @@ from procedural_textures.mandelbrotTexture import MandelbrotTexture
 from procedural_textures.mosaicTexture import MosaicTexture
 from scene.imageTexture import ImageTexture
 from core.color import Color
-import uuid
+import itertools
 
 # Note: Any new illumination model should be added here
 illumination_models = {
@@ -23,6 +23,10 @@ illumination_models = {
             'mosaic': MosaicTexture,
         }
 
+# Models are built with default settings and never changed, so one instance per name is shared by all objects
+_shared_models = {}
+_object_ids = itertools.count()
+
 
 class Object:
     def __init__(self, material=None, illumination_model='phong'):
@@ -32,24 +36,41 @@ class Object:
             'shininess': 50
         }
 
-        if illumination_model in illumination_models:
-            self.illumination_model = illumination_models[illumination_model]()
-        else:
-            print("[Warning] Unknown illumination model '{illumination_model}', defaulting to 'phong'")
-            self.illumination_model = PhongIllumination()
+        if illumination_model not in illumination_models:
+            print(f"[Warning] Unknown illumination model '{illumination_model}', defaulting to 'phong'")
+            illumination_model = 'phong'
+        if illumination_model not in _shared_models:
+            _shared_models[illumination_model] = illumination_models[illumination_model]()
+        self.illumination_model = _shared_models[illumination_model]
+
+        # Refraction constants of transparent materials, the Fresnel F0 term is the same from either side
+        try:
+            n = self.material['refractive_index']
+        except (KeyError, AttributeError):  # dict or Material without an index
+            n = None
+        self.refractive_index = n
+        self.inv_refractive_index = 1.0 / n if n else None
+        self.fresnel_f0 = ((1.0 - n) / (1.0 + n)) ** 2 if n else None
 
         self._cached_bounds = None
-        self.object_id = uuid.uuid4()
+        self.object_id = next(_object_ids)
 
     def get_bounds(self):
         """
-        Get the bounds of the object. This should be implemented by subclasses.
-        :return: A tuple representing the bounds of the object (min_x, min_y, min_z, max_x, max_y, max_z).
+        Get the bounds of the object, computed by _compute_bounds once and cached until invalidate_bounds is called.
+        :return: A tuple of two Points representing the minimum and maximum corners of the bounding box.
         """
         if self._cached_bounds is None:
-            self._cached_bounds = self.get_bounds()  # Subclass should implement this method
+            self._cached_bounds = self._compute_bounds()
         return self._cached_bounds
 
+    def _compute_bounds(self):
+        """
+        Calculate the axis-aligned bounding box of the object. This should be implemented by subclasses.
+        :return: A tuple of two Points representing the minimum and maximum corners of the bounding box.
+        """
+        raise NotImplementedError("Subclasses must implement _compute_bounds method")
+
     def invalidate_bounds(self):
         """
         Invalidate the cached bounds of the object. This should be called whenever the object changes
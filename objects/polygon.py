@@ -2,6 +2,8 @@
 Polygon is a type of Object with 3 vertices and a normal vector. It is also used to create a cuboid.
 """
 
+import numpy as np
+from numba import njit
 from objects.object import Object
 from core.point import Point
 
@@ -10,13 +12,38 @@ class Polygon(Object):
     def __init__(self, vertices, color=None, normal=None, uvs=None, kr=0.0, kt=0.0, material=None,
                  illumination_model='phong'):
         super().__init__(material, illumination_model)
-        self.vertices = vertices
+        self.vertices = vertices  # Also caches the triangle data for moller_trumbore
         self.normal = normal if normal is not None else self.calculate_normal()
         self.uvs = uvs if uvs else [(0, 0), (0, 0), (0, 0)]  # default fallback
 
         self.color = color
         self.kr = kr
         self.kt = kt
+        self.parent = None  # Composite object (e.g. Cuboid) this polygon belongs to, it owns the shading
+
+    @property
+    def vertices(self):
+        return self._vertices
+
+    @vertices.setter
+    def vertices(self, vertices):
+        """
+        Set the vertices and cache v0, edge1 and edge2 as nine floats for moller_trumbore,
+        along with the plane of the triangle as its unnormalized normal and offset.
+        :param vertices: List of three Points
+        """
+        self._vertices = vertices
+        self._triangle = None
+        self._plane = None
+        self._cached_bounds = None
+        if vertices:
+            v0, v1, v2 = vertices[:3]
+            self._triangle = tuple(float(c) for c in (v0.x, v0.y, v0.z,
+                                                       v1.x - v0.x, v1.y - v0.y, v1.z - v0.z,
+                                                       v2.x - v0.x, v2.y - v0.y, v2.z - v0.z))
+            _, _, _, e1x, e1y, e1z, e2x, e2y, e2z = self._triangle
+            nx, ny, nz = e1y * e2z - e1z * e2y, e1z * e2x - e1x * e2z, e1x * e2y - e1y * e2x
+            self._plane = nx, ny, nz, nx * v0.x + ny * v0.y + nz * v0.z
 
     def calculate_normal(self):
         """
@@ -35,46 +62,47 @@ class Polygon(Object):
         :param ray: Ray object with origin and direction.
         :return: None if no intersection, otherwise a dictionary with intersection details.
         """
-        v0, v1, v2 = self.vertices
-        e1 = v1 - v0
-        e2 = v2 - v0
-        h = ray.direction.cross(e2)
-        a = e1.dot(h)
-
         epsilon = 1e-6
-        if abs(a) < epsilon:
-            return None
 
-        f = 1 / a
-        s = ray.origin - v0
-        beta = f * s.dot(h)
-        if beta < 0 or beta > 1:
+        # Plane test first, rays parallel to the triangle or hitting its plane behind the origin are
+        # rejected without the full Möller–Trumbore test (d.n is the negated determinant of the test)
+        nx, ny, nz, d_plane = self._plane
+        denom = ray._dx * nx + ray._dy * ny + ray._dz * nz
+        if abs(denom) < epsilon or (d_plane - ray._ox * nx - ray._oy * ny - ray._oz * nz) / denom <= epsilon:
             return None
 
-        q = s.cross(e1)
-        gamma = f * ray.direction.dot(q)
-        if gamma < 0 or beta + gamma > 1:
-            return None
-
-        t = f * e2.dot(q)
+        t, beta, gamma = moller_trumbore(*self._triangle, ray._ox, ray._oy, ray._oz, ray._dx, ray._dy, ray._dz)
         if t > epsilon:
-            # For image texture mapping, we need to calculate the UV coordinates
-            (u0, v0), (u1, v1), (u2, v2) = self.uvs
-            u = (1 - beta - gamma) * u0 + beta * u1 + gamma * u2
-            v = (1 - beta - gamma) * v0 + beta * v1 + gamma * v2
-
-            return {
-                't': t,
-                'distance': t,
-                'object': self,
-                'normal': self.normal,
-                'illumination_model': self.illumination_model,
-                'material': self.material,
-                'hit_point': ray.origin + ray.direction * t,
-                'uv': (u, v)
-            }
+            return self.hit_info(ray, t, beta, gamma)
         return None
 
+    def hit_info(self, ray, t, beta, gamma):
+        """
+        Build the intersection details for a ray hitting this polygon.
+        :param ray: Ray object with origin and direction.
+        :param t: Distance along the ray to the hit point.
+        :param beta: Barycentric weight of the second vertex.
+        :param gamma: Barycentric weight of the third vertex.
+        :return: A dictionary with intersection details, reported on the parent object if there is one.
+        """
+        owner = self.parent if self.parent is not None else self
+
+        # For image texture mapping, we need to calculate the UV coordinates
+        (u0, v0), (u1, v1), (u2, v2) = self.uvs
+        u = (1 - beta - gamma) * u0 + beta * u1 + gamma * u2
+        v = (1 - beta - gamma) * v0 + beta * v1 + gamma * v2
+
+        return {
+            't': t,
+            'distance': t,
+            'object': owner,
+            'normal': self.normal,
+            'illumination_model': owner.illumination_model,
+            'material': owner.material,
+            'hit_point': ray.origin + ray.direction * t,
+            'uv': (u, v)
+        }
+
     def transform(self, matrix):
         """
         Transform the polygon by applying a transformation matrix to its vertices and normal vector.
@@ -83,10 +111,10 @@ class Polygon(Object):
         """
         self.vertices = [v.transform(matrix) for v in self.vertices]
         # Transform the normal vector using the inverse transpose of the matrix
-        self.normal = self.normal.transform(matrix.inverse().transpose()).normalize()
+        self.normal = self.normal.transform(np.linalg.inv(matrix).T).normalize()
         self.invalidate_bounds()  # Critical for KD-tree updates
 
-    def get_bounds(self):
+    def _compute_bounds(self):
         """
         Calculate the axis-aligned bounding box (AABB) for the polygon.
         :return: Tuple of two Points representing the minimum and maximum bounds.
@@ -110,3 +138,34 @@ class Polygon(Object):
 
         return Point(min_x, min_y, min_z), Point(max_x, max_y, max_z)
 
+
+
+@njit(nogil=True, fastmath=True, cache=True, inline='always')
+def moller_trumbore(v0x, v0y, v0z, e1x, e1y, e1z, e2x, e2y, e2z, ox, oy, oz, dx, dy, dz):
+    """
+    Scalar Möller–Trumbore ray-triangle test, shared by Polygon.intersect and the KD-tree traversal.
+    :return: Tuple (t, beta, gamma), t is -1 on a miss.
+    """
+    hx = dy * e2z - dz * e2y
+    hy = dz * e2x - dx * e2z
+    hz = dx * e2y - dy * e2x
+    a = e1x * hx + e1y * hy + e1z * hz
+    if abs(a) < 1e-6:
+        return -1.0, 0.0, 0.0
+
+    f = 1.0 / a
+    sx = ox - v0x
+    sy = oy - v0y
+    sz = oz - v0z
+    beta = f * (sx * hx + sy * hy + sz * hz)
+    if beta < 0.0 or beta > 1.0:
+        return -1.0, 0.0, 0.0
+
+    qx = sy * e1z - sz * e1y
+    qy = sz * e1x - sx * e1z
+    qz = sx * e1y - sy * e1x
+    gamma = f * (dx * qx + dy * qy + dz * qz)
+    if gamma < 0.0 or beta + gamma > 1.0:
+        return -1.0, 0.0, 0.0
+
+    return f * (e2x * qx + e2y * qy + e2z * qz), beta, gamma
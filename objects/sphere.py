@@ -3,8 +3,8 @@ Sphere object for ray tracing.
 """
 
 from objects.object import Object
-import numpy as np
 from core.point import Point
+from core.vector import Vector
 import math
 
 
@@ -23,28 +23,33 @@ class Sphere(Object):
         :param ray: Ray object with origin and direction.
         :return: A dictionary with intersection details if hit, otherwise None.
         """
-        oc = ray.origin - self.center
-        a = ray.direction.dot(ray.direction)
-        b = 2.0 * oc.dot(ray.direction)
-        c = oc.dot(oc) - self.radius ** 2
-        discriminant = b ** 2 - 4 * a * c
+        # Scalar floats only, Point and Vector are built for the returned hit
+        cx, cy, cz = self.center.x, self.center.y, self.center.z
+        dx, dy, dz = ray._dx, ray._dy, ray._dz
+        ocx, ocy, ocz = ray._ox - cx, ray._oy - cy, ray._oz - cz
+        # Ray directions are unit length (a = 1), so the half-b form of the quadratic applies
+        b = ocx * dx + ocy * dy + ocz * dz
+        c = ocx * ocx + ocy * ocy + ocz * ocz - self.radius ** 2
+        discriminant = b * b - c
 
         if discriminant < 0:
             return None  # No intersection
 
-        t1 = (-b - np.sqrt(discriminant)) / (2.0 * a)
-        t2 = (-b + np.sqrt(discriminant)) / (2.0 * a)
+        # Nearest positive root, t1 <= t2
+        sqrt_disc = math.sqrt(discriminant)
+        t = -b - sqrt_disc
+        if t <= 0:
+            t = -b + sqrt_disc
+        if t > 0:
+            px, py, pz = ray._ox + dx * t, ray._oy + dy * t, ray._oz + dz * t
+            nx, ny, nz = px - cx, py - cy, pz - cz
+            length = math.sqrt(nx * nx + ny * ny + nz * nz)
+            if length > 0:
+                nx, ny, nz = nx / length, ny / length, nz / length
 
-        t_values = [t for t in (t1, t2) if t > 0]
-        if t_values:
-            t = min(t_values)
-            intersection_point = ray.origin + ray.direction * t
-            normal = (intersection_point - self.center).normalize()
-
-            # Spherical UV mapping with seam fix
-            p = normal  # Already normalized direction from center
-            theta = math.atan2(p.z, p.x)  # [-π, π]
-            phi = math.acos(p.y)  # [0, π]
+            # Spherical UV mapping with seam fix, the normal is already the normalized direction from center
+            theta = math.atan2(nz, nx)  # [-π, π]
+            phi = math.acos(max(-1.0, min(1.0, ny)))  # [0, π]
 
             # Wrap with epsilon to avoid u == 0 or u == 1 exactly (helps with seam)
             u = ((theta + math.pi) / (2 * math.pi)) % 1.0
@@ -61,10 +66,10 @@ class Sphere(Object):
                 't': t,
                 'distance': t,
                 'object': self,
-                'normal': normal,
+                'normal': Vector(nx, ny, nz),
                 'illumination_model': self.illumination_model,
                 'material': self.material,
-                'hit_point': intersection_point,
+                'hit_point': Point(px, py, pz),
                 'uv': (u, v)
             }
 
@@ -79,7 +84,7 @@ class Sphere(Object):
         self.center = self.center.transform(matrix)
         self.invalidate_bounds()
 
-    def get_bounds(self):
+    def _compute_bounds(self):
         """
         Get the axis-aligned bounding box of the sphere.
         :return: A tuple of two Points representing the minimum and maximum corners of the bounding box.
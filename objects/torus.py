@@ -2,7 +2,8 @@
 Torus object implementation for ray tracing.
 """
 
-import numpy as np, math
+import math
+from numba import njit
 from objects.object import Object
 from core.point import Point
 from core.vector import Vector
@@ -22,6 +23,10 @@ class Torus(Object):
         self.center = center
         self.R = major_radius
         self.r = minor_radius
+        # Radius terms of the quartic, constant per torus
+        self._R2 = major_radius * major_radius
+        self._4R2 = 4 * self._R2
+        self._Rr_const = self._R2 - minor_radius * minor_radius
         self.color = color
         self.kr = kr
         self.kt = kt
@@ -32,72 +37,43 @@ class Torus(Object):
         :param ray: Ray object with origin and direction.
         :return: A dictionary with intersection details if hit, otherwise None.
         """
-        # move into torus‐local space
-        O = ray.origin - self.center
-        D = ray.direction
-
-        # helper dot products
-        Ox, Oy, Oz = O.x, O.y, O.z
-        Dx, Dy, Dz = D.x, D.y, D.z
-        R, r = self.R, self.r
+        # move into torus‐local space, scalar floats only
+        Ox, Oy, Oz = ray._ox - self.center.x, ray._oy - self.center.y, ray._oz - self.center.z
+        Dx, Dy, Dz = ray._dx, ray._dy, ray._dz
+        R4 = self._4R2
 
         # build quartic coefficients for: (||P(t)||^2 + R^2 - r^2)^2 - 4R^2 (Px^2 + Pz^2) = 0
-        G = D.dot(D)
-        H = 2 * O.dot(D)
-        I = O.dot(O) + R*R - r*r
+        G = Dx*Dx + Dy*Dy + Dz*Dz
+        H = 2 * (Ox*Dx + Oy*Dy + Oz*Dz)
+        I = Ox*Ox + Oy*Oy + Oz*Oz + self._Rr_const
 
         coeff4 = G*G
         coeff3 = 2*G*H
-        coeff2 = 2*G*I + H*H - 4*R*R*(Dx*Dx + Dz*Dz)
-        coeff1 = 2*H*I - 8*R*R*(Dx*Ox + Dz*Oz)
-        coeff0 = I*I - 4*R*R*(Ox*Ox + Oz*Oz)
-
-        # solve quartic
-        roots = np.roots([coeff4, coeff3, coeff2, coeff1, coeff0])
-        # pick the smallest positive real root
-        ts = [rt.real for rt in roots if abs(rt.imag) < 1e-6 and rt.real > 1e-5]
-        if not ts:
+        coeff2 = 2*G*I + H*H - R4*(Dx*Dx + Dz*Dz)
+        coeff1 = 2*H*I - 2*R4*(Dx*Ox + Dz*Oz)
+        coeff0 = I*I - R4*(Ox*Ox + Oz*Oz)
+
+        # solve quartic, pick the smallest positive real root
+        n, r0, r1, r2, r3 = solve_quartic(coeff4, coeff3, coeff2, coeff1, coeff0)
+        t = math.inf
+        for i, root in enumerate((r0, r1, r2, r3)):
+            if i < n and 1e-5 < root < t:
+                t = root
+        if t == math.inf:
             return None
-        t = min(ts)
-        P = ray.origin + ray.direction * t
-
-        # compute normal via gradient of implicit function
-        # at local P': (x,y,z) = (P - center)
-        loc = P - self.center
-        x, y, z = loc.x, loc.y, loc.z
-        sum2 = x*x + y*y + z*z + R*R - r*r
-        nx = 4*x*sum2 - 8*R*R*x
-        ny = 4*y*sum2
-        nz = 4*z*sum2 - 8*R*R*z
-        normal = Vector(nx, ny, nz).normalize()
-
-        # UV mapping
-        # u: around the big circle
-        theta = math.atan2(z, x)
-        u = ((theta + math.pi) / (2*math.pi)) % 1.0
-
-        # find the center of the tube circle at that theta
-        cx = R * math.cos(theta)
-        cz = R * math.sin(theta)
-        # v: around the small circle (φ)
-        vx = x - cx
-        vz = z - cz
-        phi = math.atan2(y, math.hypot(vx, vz))
-        v = (phi / (2*math.pi)) + 0.5
-
-        # nudge off seams
-        eps = 1e-5
-        u = min(max(u, eps), 1-eps)
-        v = min(max(v, eps), 1-eps)
+        Px, Py, Pz = ray._ox + Dx * t, ray._oy + Dy * t, ray._oz + Dz * t
+
+        # normal and UV of the local hit point, P - center
+        nx, ny, nz, u, v = _normal_uv(Px - self.center.x, Py - self.center.y, Pz - self.center.z, self.R, self.r)
 
         return {
             't': t,
             'distance': t,
             'object': self,
-            'normal': normal,
+            'normal': Vector(nx, ny, nz),
             'illumination_model': self.illumination_model,
             'material': self.material,
-            'hit_point': P,
+            'hit_point': Point(Px, Py, Pz),
             'uv': (u, v)
         }
 
@@ -111,7 +87,7 @@ class Torus(Object):
         self.center = self.center.transform(matrix)
         self.invalidate_bounds()
 
-    def get_bounds(self):
+    def _compute_bounds(self):
         """
         Get the axis-aligned bounding box of the torus.
         :return: A tuple of two Points representing the minimum and maximum corners of the bounding box.
@@ -122,3 +98,142 @@ class Torus(Object):
         min_pt = Point(cx - (R + r), cy - r, cz - (R + r))
         max_pt = Point(cx + (R + r), cy + r, cz + (R + r))
         return min_pt, max_pt
+
+
+
+@njit(nogil=True, fastmath=True, cache=True)
+def _solve_quadratic(b, c):
+    """
+    Real roots of x^2 + b x + c = 0.
+    :return: Tuple (n, x0, x1) with the number of real roots first.
+    """
+    disc = b * b - 4.0 * c
+    if disc < 0.0:
+        return 0, 0.0, 0.0
+    # Numerically stable form, avoids cancellation between -b and the square root
+    q = -0.5 * (b + math.copysign(math.sqrt(disc), b))
+    if q == 0.0:
+        return 2, 0.0, 0.0
+    return 2, q, c / q
+
+
+@njit(nogil=True, fastmath=True, cache=True)
+def _polish(x, b, c, d, e):
+    """
+    Two Newton steps on the monic quartic x^4 + b x^3 + c x^2 + d x + e, a step is kept only if it improves the root.
+    :return: Refined root.
+    """
+    for _ in range(2):
+        f = (((x + b) * x + c) * x + d) * x + e
+        fp = ((4.0 * x + 3.0 * b) * x + 2.0 * c) * x + d
+        if fp == 0.0:
+            break
+        x_new = x - f / fp
+        if abs((((x_new + b) * x_new + c) * x_new + d) * x_new + e) >= abs(f):
+            break
+        x = x_new
+    return x
+
+
+@njit(nogil=True, fastmath=True, cache=True)
+def solve_quartic(a, b, c, d, e):
+    """
+    Real roots of a x^4 + b x^3 + c x^2 + d x + e = 0 with Ferrari's method, replaces np.roots for the torus.
+    :return: Tuple (n, r0, r1, r2, r3), only the first n roots are valid.
+    """
+    if a == 0.0:
+        return 0, 0.0, 0.0, 0.0, 0.0
+    b, c, d, e = b / a, c / a, d / a, e / a
+
+    # Depressed quartic y^4 + p y^2 + q y + r with x = y - b/4
+    shift = -0.25 * b
+    b2 = b * b
+    p = c - 0.375 * b2
+    q = d - 0.5 * b * c + 0.125 * b2 * b
+    r = e - 0.25 * b * d + 0.0625 * b2 * c - 0.01171875 * b2 * b2
+
+    roots = [0.0, 0.0, 0.0, 0.0]
+    n = 0
+    if abs(q) < 1e-12:
+        # Biquadratic, solve for y^2
+        nz, z0, z1 = _solve_quadratic(p, r)
+        for z in (z0, z1):
+            if nz and z >= 0.0:
+                y = math.sqrt(z)
+                roots[n] = y + shift
+                roots[n + 1] = -y + shift
+                n += 2
+    else:
+        # Largest root of the resolvent cubic m^3 + p m^2 + (p^2/4 - r) m - q^2/8, positive since q != 0
+        a2 = p
+        a1 = 0.25 * p * p - r
+        a0 = -0.125 * q * q
+        cp = a1 - a2 * a2 / 3.0
+        cq = 2.0 * a2 * a2 * a2 / 27.0 - a2 * a1 / 3.0 + a0
+        disc = 0.25 * cq * cq + cp * cp * cp / 27.0
+        if disc >= 0.0:
+            sq = math.sqrt(disc)
+            u = -0.5 * cq + sq
+            v = -0.5 * cq - sq
+            w = math.copysign(abs(u) ** (1.0 / 3.0), u) + math.copysign(abs(v) ** (1.0 / 3.0), v)
+        else:
+            cos_arg = min(max(1.5 * cq / cp * math.sqrt(-3.0 / cp), -1.0), 1.0)
+            w = 2.0 * math.sqrt(-cp / 3.0) * math.cos(math.acos(cos_arg) / 3.0)
+        m = w - a2 / 3.0
+        # One Newton step on the cubic sharpens m before it is square-rooted, kept only if it improves m:
+        # at a double root of the cubic (a double root of the quartic) fp is near 0 and the step can overshoot
+        f = ((m + a2) * m + a1) * m + a0
+        fp = (3.0 * m + 2.0 * a2) * m + a1
+        if fp != 0.0:
+            m_new = m - f / fp
+            if abs(((m_new + a2) * m_new + a1) * m_new + a0) < abs(f):
+                m = m_new
+        if m <= 0.0:
+            return 0, 0.0, 0.0, 0.0, 0.0
+
+        # Split into two quadratics y^2 -+ s y + (p/2 + m +- q/(2s))
+        s = math.sqrt(2.0 * m)
+        half = 0.5 * p + m
+        k = q / (2.0 * s)
+        for sign in (1.0, -1.0):
+            ny, y0, y1 = _solve_quadratic(sign * s, half - sign * k)
+            if ny:
+                roots[n] = y0 + shift
+                roots[n + 1] = y1 + shift
+                n += 2
+
+    for i in range(n):
+        roots[i] = _polish(roots[i], b, c, d, e)
+    return n, roots[0], roots[1], roots[2], roots[3]
+
+
+@njit(nogil=True, fastmath=True, cache=True)
+def _normal_uv(x, y, z, R, r):
+    """
+    Normal and UV coordinates of a point on the torus, in torus-local space.
+    :return: Tuple (nx, ny, nz, u, v) with a normalized normal.
+    """
+    # normal via gradient of implicit function
+    sum2 = x*x + y*y + z*z + R*R - r*r
+    nx = 4*x*sum2 - 8*R*R*x
+    ny = 4*y*sum2
+    nz = 4*z*sum2 - 8*R*R*z
+    length = math.sqrt(nx*nx + ny*ny + nz*nz)
+    if length > 0.0:
+        nx, ny, nz = nx / length, ny / length, nz / length
+
+    # u: around the big circle
+    theta = math.atan2(z, x)
+    u = ((theta + math.pi) / (2*math.pi)) % 1.0
+
+    # v: around the small circle (φ), measured from the center of the tube circle at that theta
+    vx = x - R * math.cos(theta)
+    vz = z - R * math.sin(theta)
+    phi = math.atan2(y, math.hypot(vx, vz))
+    v = (phi / (2*math.pi)) + 0.5
+
+    # nudge off seams
+    eps = 1e-5
+    u = min(max(u, eps), 1-eps)
+    v = min(max(v, eps), 1-eps)
+    return nx, ny, nz, u, v
@@ -0,0 +1,132 @@
+"""
+TriangleMesh is a type of Object storing many triangles as flat arrays with one shared material.
+Used for large meshes (e.g. the Stanford bunny) instead of one Polygon object per triangle.
+"""
+
+import numpy as np
+from numba import njit
+from objects.object import Object
+from objects.polygon import moller_trumbore
+from core import fastvec
+from core.point import Point
+from core.vector import Vector
+
+
+class TriangleMesh(Object):
+    def __init__(self, vertices, faces, color, normals=None, kr=0.0, kt=0.0, material=None,
+                 illumination_model='phong'):
+        """
+        :param vertices: (V, 3) array of vertex positions.
+        :param faces: (F, 3) array of vertex indices per triangle.
+        :param color: Color shared by all triangles.
+        :param normals: Optional (F, 3) array of face normals, computed from the vertices if not given.
+        """
+        super().__init__(material, illumination_model)
+        self.vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        self.faces = np.asarray(faces, dtype=np.int32).reshape(-1, 3)
+        self.normals = (fastvec.face_normals(self.vertices, self.faces) if normals is None
+                        else np.asarray(normals, dtype=np.float64).reshape(-1, 3))
+
+        self.color = color
+        self.kr = kr
+        self.kt = kt
+        self._triangles = None
+
+    def triangle_arrays(self):
+        """
+        Triangle data in the layout used for ray intersection, float32 arrays built once and cached.
+        :return: Tuple of (F, 3) arrays (v0, edge1, edge2).
+        """
+        if self._triangles is None:
+            v0 = self.vertices[self.faces[:, 0]]
+            edge1 = fastvec.sub(self.vertices[self.faces[:, 1]], v0)
+            edge2 = fastvec.sub(self.vertices[self.faces[:, 2]], v0)
+            self._triangles = tuple(np.ascontiguousarray(a, dtype=np.float32) for a in (v0, edge1, edge2))
+        return self._triangles
+
+    def face_bounds(self):
+        """
+        Axis-aligned bounding box of every triangle.
+        :return: Tuple of (F, 3) arrays with the minimum and maximum corners.
+        """
+        corners = self.vertices[self.faces]
+        return corners.min(axis=1), corners.max(axis=1)
+
+    def intersect(self, ray):
+        """
+        Ray-mesh intersection, Möller–Trumbore against all triangles at once.
+        :param ray: Ray object with origin and direction.
+        :return: None if no intersection, otherwise a dictionary with intersection details of the nearest triangle.
+        """
+        skip = ray.space[1] if isinstance(ray.space, tuple) and ray.space[0] is self else -1
+        t, face, beta, gamma = _closest_triangle(ray._ox, ray._oy, ray._oz, ray._dx, ray._dy, ray._dz,
+                                                 *self.triangle_arrays(), skip)
+        if face < 0:
+            return None
+        return self.hit_info(ray, face, t, beta, gamma)
+
+    def hit_info(self, ray, face, t, beta, gamma):
+        """
+        Build the intersection details for a ray hitting one triangle of the mesh.
+        :param ray: Ray object with origin and direction.
+        :param face: Index of the triangle that was hit.
+        :param t: Distance along the ray to the hit point.
+        :param beta: Barycentric weight of the second vertex.
+        :param gamma: Barycentric weight of the third vertex.
+        :return: A dictionary with intersection details, 'face' holds the triangle index.
+        """
+        return {
+            't': t,
+            'distance': t,
+            'object': self,
+            'face': int(face),
+            'normal': Vector(*self.normals[face].tolist()),
+            'illumination_model': self.illumination_model,
+            'material': self.material,
+            'hit_point': ray.origin + ray.direction * t,
+            'uv': (0, 0)
+        }
+
+    def transform(self, matrix):
+        """
+        Transform the mesh by applying a transformation matrix to all vertices at once.
+        :param matrix: Transformation matrix to apply.
+        :return: None
+        """
+        self.vertices = fastvec.transform_batch(self.vertices, matrix)
+        self.normals = fastvec.face_normals(self.vertices, self.faces)
+        self._triangles = None
+        self.invalidate_bounds()  # Critical for KD-tree updates
+
+    def _compute_bounds(self):
+        """
+        Calculate the axis-aligned bounding box (AABB) of the whole mesh.
+        :return: Tuple of two Points representing the minimum and maximum bounds.
+        """
+        if len(self.vertices) == 0:
+            return None
+        return Point(*self.vertices.min(axis=0).tolist()), Point(*self.vertices.max(axis=0).tolist())
+
+
+@njit(nogil=True, fastmath=True, cache=True)
+def _closest_triangle(ox, oy, oz, dx, dy, dz, v0, edge1, edge2, skip):
+    """
+    Möller–Trumbore against every triangle in one loop, no per-triangle temporaries.
+    :param skip: Index of a triangle to ignore (the one that spawned the ray), -1 for none.
+    :return: Tuple (t, face, beta, gamma) of the nearest hit, face is -1 on a miss.
+    """
+    best_t = np.inf
+    best_face = -1
+    best_beta = 0.0
+    best_gamma = 0.0
+    for j in range(v0.shape[0]):
+        t, beta, gamma = moller_trumbore(v0[j, 0], v0[j, 1], v0[j, 2],
+                                         edge1[j, 0], edge1[j, 1], edge1[j, 2],
+                                         edge2[j, 0], edge2[j, 1], edge2[j, 2],
+                                         ox, oy, oz, dx, dy, dz)
+        if 1e-6 < t < best_t and j != skip:
+            best_t = t
+            best_face = j
+            best_beta = beta
+            best_gamma = gamma
+    return best_t, best_face, best_beta, best_gamma
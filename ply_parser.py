@@ -1,46 +1,81 @@
-def load_ply(filename, color, kr=0.0, kt=0.0, material=None):
-    from objects.polygon import Polygon
-    from core.point import Point
+import numpy as np
+from itertools import islice
+
+# PLY property types and their numpy equivalents
+PLY_TYPES = {
+    'char': 'i1', 'uchar': 'u1', 'short': 'i2', 'ushort': 'u2', 'int': 'i4', 'uint': 'u4',
+    'float': 'f4', 'double': 'f8', 'int8': 'i1', 'uint8': 'u1', 'int16': 'i2', 'uint16': 'u2',
+    'int32': 'i4', 'uint32': 'u4', 'float32': 'f4', 'float64': 'f8',
+}
 
-    vertices = []
-    faces = []
-    polygons = []
 
-    with open(filename, 'r') as f:
-        line = f.readline()
+def load_ply(filename, color, kr=0.0, kt=0.0, material=None):
+    """
+    Load a triangle mesh from an ASCII or binary PLY file.
+    :param filename: Path to the .ply file.
+    :param color: Color of the mesh.
+    :return: TriangleMesh holding all triangles of the file, non-triangular faces are skipped.
+    """
+    from objects.triangleMesh import TriangleMesh
+
+    with open(filename, 'rb') as f:
+        line = f.readline().decode('ascii')
         assert line.startswith("ply"), "Not a PLY file"
-        is_ascii = False
+        byte_order = None  # None for ASCII, '<' or '>' for binary
         vertex_count = 0
         face_count = 0
+        vertex_props = []  # (name, type) of every vertex property
+        face_props = []  # (name, type) of every face property, lists as (name, (count type, index type))
+        props = None
 
         while line.strip() != "end_header":
-            if line.startswith("format ascii"):
-                is_ascii = True
+            parts = line.split()
+            if line.startswith("format"):
+                byte_order = {'ascii': None, 'binary_little_endian': '<', 'binary_big_endian': '>'}[parts[1]]
             elif line.startswith("element vertex"):
-                vertex_count = int(line.split()[-1])
+                vertex_count = int(parts[-1])
+                props = vertex_props
             elif line.startswith("element face"):
-                face_count = int(line.split()[-1])
-            line = f.readline()
-
-        # Read vertices
-        for _ in range(vertex_count):
-            parts = f.readline().strip().split()
-            x, y, z = map(float, parts[:3])
-            vertices.append(Point(x, y, z))
-
-        # Read faces (assume triangle)
-        for _ in range(face_count):
-            parts = f.readline().strip().split()
-            if int(parts[0]) != 3:
-                continue  # Skip non-triangular faces
-            i1, i2, i3 = map(int, parts[1:4])
-            tri = Polygon(
-                vertices=[vertices[i1], vertices[i2], vertices[i3]],
-                color=color,
-                kr=kr,
-                kt=kt,
-                material=material
-            )
-            polygons.append(tri)
-
-    return polygons
+                face_count = int(parts[-1])
+                props = face_props
+            elif line.startswith("element"):
+                props = None
+            elif line.startswith("property") and props is not None:
+                if parts[1] == 'list':
+                    props.append((parts[4], (PLY_TYPES[parts[2]], PLY_TYPES[parts[3]])))
+                else:
+                    props.append((parts[2], PLY_TYPES[parts[1]]))
+            line = f.readline().decode('ascii')
+
+        if byte_order is None:
+            # Read vertices, only x, y and z are used
+            vertices = np.loadtxt((row.decode('ascii') for row in islice(f, vertex_count)),
+                                  dtype=np.float64, usecols=(0, 1, 2), ndmin=2)
+
+            # Read faces, skipping non-triangular ones
+            faces = []
+            for _ in range(face_count):
+                parts = f.readline().split()
+                if int(parts[0]) != 3:
+                    continue
+                faces.append(tuple(map(int, parts[1:4])))
+        else:
+            # Binary PLY, every element is read at once as a structured array
+            vertex_dtype = np.dtype([(name, byte_order + kind) for name, kind in vertex_props])
+            data = np.fromfile(f, dtype=vertex_dtype, count=vertex_count)
+            vertices = np.stack((data['x'], data['y'], data['z']), axis=1)
+
+            # Faces have a fixed record size only if they are all triangles
+            face_fields = []
+            for name, kind in face_props:
+                if isinstance(kind, tuple):
+                    face_fields += [('n', byte_order + kind[0]), ('indices', byte_order + kind[1], 3)]
+                else:
+                    face_fields.append((name, byte_order + kind))
+            data = np.fromfile(f, dtype=np.dtype(face_fields), count=face_count)
+            if np.any(data['n'] != 3):
+                raise ValueError("Binary PLY files must only contain triangular faces")
+            faces = data['indices']
+
+    # One mesh object holding all triangles, intersected in a single vectorized test
+    return TriangleMesh(vertices, faces, color, kr=kr, kt=kt, material=material)
@@ -4,6 +4,7 @@ Class for procedural brick texture, child of illumination model class
 
 from scene.illuminationModel import IlluminationModel
 from core.color import Color
+import numpy as np
 import math
 
 
@@ -23,25 +24,53 @@ class BrickTexture(IlluminationModel):
         self.brick_width = brick_width
         self.brick_height = brick_height
         self.mortar_thickness = mortar_thickness
+        self._inv_w = 1.0 / brick_width
+        self._inv_h = 1.0 / brick_height
+        # Lookup table of the three colors for illuminate_batch, indexed by brick parity or 2 for mortar
+        self._palette = np.array([brick_color1.rgb, brick_color2.rgb, mortar_color.rgb], dtype=np.float32)
 
     def illuminate(self, object_color, light_color, normal, light, view, material, intersection_point):
         u = intersection_point.x
         v = intersection_point.y
 
-        # Compute which row and column this point is in
-        row = math.floor(v / self.brick_height)
-        col = math.floor((u + (self.brick_width / 2 if row % 2 else 0)) / self.brick_width)
+        # Compute which row and column this point is in, odd rows are shifted by half a brick
+        row = math.floor(v * self._inv_h)
+        u_shifted = u + self.brick_width / 2 if row & 1 else u
+        col = math.floor(u_shifted * self._inv_w)
 
-        # Compute local position within the brick tile
-        u_mod = (u + (self.brick_width / 2 if row % 2 else 0)) % self.brick_width
-        v_mod = v % self.brick_height
+        # Compute local position within the brick tile from the row and column already found
+        u_mod = u_shifted - col * self.brick_width
+        v_mod = v - row * self.brick_height
 
         # Mortar check
         if u_mod < self.mortar_thickness or v_mod < self.mortar_thickness:
             return self.mortar_color
 
         # Choose alternating brick colors
-        if (row + col) % 2 == 0:
+        if not (row + col) & 1:
             return self.brick_color1
         else:
             return self.brick_color2
+
+    def illuminate_batch(self, points):
+        """
+        Brick colors for many hit points at once, same pattern as illuminate.
+        :param points: (N, 3) array of intersection points, x and y are used as texture coordinates.
+        :return: (N, 3) float32 array of RGB colors.
+        """
+        # Coordinates stay float64 and follow the steps of illuminate, so both agree on the brick edges
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        u = points[:, 0]
+        v = points[:, 1]
+
+        # Odd rows are shifted by half a brick
+        row = np.floor(v * self._inv_h)
+        u_shifted = np.where(row % 2 == 1, u + self.brick_width / 2, u)
+        col = np.floor(u_shifted * self._inv_w)
+
+        u_mod = u_shifted - col * self.brick_width
+        v_mod = v - row * self.brick_height
+        mortar = (u_mod < self.mortar_thickness) | (v_mod < self.mortar_thickness)
+        index = ((row + col) % 2).astype(np.uint8)
+        index[mortar] = 2
+        return self._palette[index]
@@ -0,0 +1,151 @@
+"""
+CUDA versions of the Mandelbrot and mosaic texture batches, one GPU thread per hit point.
+Used by the textures' illuminate_batch when a CUDA device is available (core.cudaTraversal.available).
+Set NUMBA_ENABLE_CUDASIM=1 to run the kernels on the CPU simulator.
+"""
+
+import math
+import numpy as np
+from numba import cuda
+
+THREADS_PER_BLOCK = 128
+
+# float32 constants keep the kernel arithmetic in single precision
+_ZERO = np.float32(0.0)
+_HALF = np.float32(0.5)
+_ONE = np.float32(1.0)
+_TWO = np.float32(2.0)
+_FOUR = np.float32(4.0)
+_LOG2 = np.float32(math.log(2.0))
+_MAX_BYTE = np.float32(255.0)
+
+
+def _launch(kernel, n, *args):
+    """
+    Launch a 1D kernel with one thread per point.
+    """
+    blocks = (n + THREADS_PER_BLOCK - 1) // THREADS_PER_BLOCK
+    if blocks:
+        kernel[blocks, THREADS_PER_BLOCK](*args)
+
+
+def mandelbrot_batch(cr, ci, max_iter, inside):
+    """
+    Mandelbrot colors of many points of the complex plane on the GPU, same mapping as MandelbrotTexture.
+    :param cr: (N,) array of real parts.
+    :param ci: (N,) array of imaginary parts.
+    :param inside: (3,) uint8 color of points that do not escape.
+    :return: (N, 3) uint8 array of RGB colors.
+    """
+    n = len(cr)
+    out = cuda.device_array((n, 3), dtype=np.uint8)
+    _launch(_mandel_kernel, n,
+            cuda.to_device(np.ascontiguousarray(cr, dtype=np.float32)),
+            cuda.to_device(np.ascontiguousarray(ci, dtype=np.float32)),
+            max_iter, int(inside[0]), int(inside[1]), int(inside[2]), out)
+    return out.copy_to_host()
+
+
+def mosaic_batch(xs, ys, cell_count, border_thickness, seed):
+    """
+    Mosaic colors of many texture coordinates on the GPU, same cells and colors as MosaicTexture.
+    :param xs: (N,) array of x texture coordinates.
+    :param ys: (N,) array of y texture coordinates.
+    :return: (N, 3) float32 array of RGB colors.
+    """
+    n = len(xs)
+    out = cuda.device_array((n, 3), dtype=np.float32)
+    _launch(_mosaic_kernel, n,
+            cuda.to_device(np.ascontiguousarray(xs, dtype=np.float64)),
+            cuda.to_device(np.ascontiguousarray(ys, dtype=np.float64)),
+            cell_count, border_thickness, seed, out)
+    return out.copy_to_host()
+
+
+@cuda.jit
+def _mandel_kernel(cr, ci, max_iter, inside_r, inside_g, inside_b, out):
+    """
+    Smooth escape iteration count of one point mapped to the blue → white gradient of MandelbrotTexture.map_color,
+    stored with 8 bits per channel like mandelbrotTexture._mandel_batch.
+    """
+    i = cuda.grid(1)
+    if i >= cr.shape[0]:
+        return
+
+    zr = _ZERO
+    zi = _ZERO
+    for n in range(max_iter):
+        zr, zi = zr * zr - zi * zi + cr[i], _TWO * zr * zi + ci[i]
+        abs2 = zr * zr + zi * zi
+        if abs2 > _FOUR:
+            t = (n + 1 - math.log(_HALF * math.log(abs2)) / _LOG2) / max_iter
+            out[i, 0] = np.uint8(min(_ONE, t * _FOUR) * _MAX_BYTE + _HALF)
+            out[i, 1] = np.uint8(min(_ONE, t * t * np.float32(1.5)) * _MAX_BYTE + _HALF)
+            out[i, 2] = np.uint8(min(_ONE, _HALF + t) * _MAX_BYTE + _HALF)
+            return
+
+    out[i, 0] = inside_r
+    out[i, 1] = inside_g
+    out[i, 2] = inside_b
+
+
+@cuda.jit(device=True, inline=True)
+def _mix(h):
+    """
+    Integer hash (lowbias32) of a 32-bit value, see mosaicTexture._mix.
+    """
+    h ^= h >> 16
+    h = (h * 0x7feb352d) & 0xFFFFFFFF
+    h ^= h >> 15
+    h = (h * 0x846ca68b) & 0xFFFFFFFF
+    h ^= h >> 16
+    return h
+
+
+@cuda.jit
+def _mosaic_kernel(xs, ys, cell_count, border_thickness, seed, out):
+    """
+    Voronoi mosaic color of one point, the same steps as mosaicTexture._mosaic.
+    """
+    i = cuda.grid(1)
+    if i >= xs.shape[0]:
+        return
+
+    u = xs[i] * cell_count
+    v = ys[i] * cell_count
+    cell_x = int(math.floor(u))
+    cell_y = int(math.floor(v))
+
+    min_d = math.inf
+    second_d = math.inf
+    chosen_r = 0.0
+    chosen_g = 0.0
+    chosen_b = 0.0
+    for ix in range(cell_x - 1, cell_x + 2):
+        for iy in range(cell_y - 1, cell_y + 2):
+            h = _mix((ix * 73856093 ^ iy * 19349663 ^ seed) & 0xFFFFFFFF)
+            sx = ix + h / 4294967296.0
+            h = _mix(h)
+            sy = iy + h / 4294967296.0
+
+            d = math.hypot(u - sx, v - sy)
+            if d < min_d:
+                second_d, min_d = min_d, d
+                h = _mix(h)
+                chosen_r = 0.1 + 0.7 * (h / 4294967296.0)
+                h = _mix(h)
+                chosen_g = 0.1 + 0.7 * (h / 4294967296.0)
+                h = _mix(h)
+                chosen_b = 0.1 + 0.7 * (h / 4294967296.0)
+            elif d < second_d:
+                second_d = d
+
+    if (second_d - min_d) < border_thickness:
+        out[i, 0] = 0.05
+        out[i, 1] = 0.05
+        out[i, 2] = 0.05
+        return
+
+    out[i, 0] = max(0.0, min(1.0, (chosen_r - 0.5) * 1.5 + 0.5))
+    out[i, 1] = max(0.0, min(1.0, (chosen_g - 0.5) * 1.5 + 0.5))
+    out[i, 2] = max(0.0, min(1.0, (chosen_b - 0.5) * 1.5 + 0.5))
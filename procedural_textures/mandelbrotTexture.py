@@ -4,6 +4,10 @@ Class for procedural mandelbrot texture, child of illumination model class
 
 from scene.illuminationModel import IlluminationModel
 from core.color import Color
+from core import cudaTraversal
+from procedural_textures import cudaTextures
+from numba import njit, prange
+import numpy as np
 import math
 
 
@@ -13,22 +17,18 @@ class MandelbrotTexture(IlluminationModel):
         zoom=7,
         center_x=-0.75,
         center_y=0.0,
-        max_iter=300
+        max_iter=300,
+        use_gpu=True
     ):
         self.zoom = zoom
         self.center_x = center_x
         self.center_y = center_y
         self.max_iter = max_iter
+        self.use_gpu = use_gpu  # illuminate_batch runs on a CUDA device when one is available
         self.inside_color = Color(0.0, 0.0, 0.0)
 
     def mandelbrot_smooth(self, c):
-        z = 0
-        for n in range(self.max_iter):
-            z = z * z + c
-            if abs(z) > 2:
-                # Smooth iteration count
-                return n + 1 - math.log(math.log(abs(z))) / math.log(2)
-        return self.max_iter
+        return _mandel_smooth(c.real, c.imag, self.max_iter)
 
     def map_color(self, t):
         # Map t ∈ [0, 1] to blue → white gradient
@@ -58,3 +58,73 @@ class MandelbrotTexture(IlluminationModel):
             t = smooth_iter / self.max_iter
             return self.map_color(t)
 
+    def illuminate_batch(self, points):
+        """
+        Mandelbrot colors for many hit points at once, the escape loop runs in parallel over the points in float32,
+        on the GPU if possible, otherwise on all CPU cores. Colors are quantized to 8 bits per channel, so a result
+        is within the float32 and 1/255 roundings of illuminate.
+        :param points: (N, 3) array of intersection points, x and y are used as texture coordinates.
+        :return: (N, 3) float32 array of RGB colors.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        cr = ((points[:, 0] * 2.0 - self.center_x) / self.zoom).astype(np.float32)
+        ci = ((points[:, 1] * 2.0 - self.center_y) / self.zoom).astype(np.float32)
+        inside = np.round(np.array(self.inside_color.rgb) * 255).astype(np.uint8)
+        if self.use_gpu and cudaTraversal.available():
+            out = cudaTextures.mandelbrot_batch(cr, ci, self.max_iter, inside)
+        else:
+            out = np.empty((len(points), 3), dtype=np.uint8)
+            _mandel_batch(cr, ci, self.max_iter, inside, out)
+        return out * np.float32(1.0 / 255)
+
+
+@njit(nogil=True, fastmath=True, cache=True)
+def _mandel_smooth(cr, ci, max_iter):
+    """
+    Smooth escape iteration count of c = cr + ci*i, on real floats instead of Python complex numbers.
+    :return: Smooth iteration count, max_iter if the point does not escape.
+    """
+    zr = 0.0
+    zi = 0.0
+    for n in range(max_iter):
+        zr, zi = zr * zr - zi * zi + cr, 2.0 * zr * zi + ci
+        abs2 = zr * zr + zi * zi
+        if abs2 > 4.0:
+            # Smooth iteration count, log(|z|) = log(|z|^2) / 2
+            return n + 1 - math.log(0.5 * math.log(abs2)) / math.log(2.0)
+    return float(max_iter)
+
+
+# float32 constants keep the batch escape loop in single precision
+_F32_TWO = np.float32(2.0)
+_F32_FOUR = np.float32(4.0)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _mandel_batch(cr, ci, max_iter, inside, out):
+    """
+    Colors of many points of the complex plane, same gradient as MandelbrotTexture.map_color.
+    :param cr: (N,) float32 array of real parts.
+    :param ci: (N,) float32 array of imaginary parts.
+    :param inside: (3,) uint8 color of points that do not escape.
+    :param out: (N, 3) uint8 array the colors are written to.
+    """
+    for i in prange(cr.shape[0]):
+        zr = np.float32(0.0)
+        zi = np.float32(0.0)
+        t = -1.0
+        for n in range(max_iter):
+            zr, zi = zr * zr - zi * zi + cr[i], _F32_TWO * zr * zi + ci[i]
+            abs2 = zr * zr + zi * zi
+            if abs2 > _F32_FOUR:
+                t = (n + 1 - math.log(0.5 * math.log(abs2)) / math.log(2.0)) / max_iter
+                break
+
+        if t < 0.0:
+            out[i, 0] = inside[0]
+            out[i, 1] = inside[1]
+            out[i, 2] = inside[2]
+        else:
+            out[i, 0] = np.uint8(min(1.0, t * 4.0) * 255.0 + 0.5)
+            out[i, 1] = np.uint8(min(1.0, t * t * 1.5) * 255.0 + 0.5)
+            out[i, 2] = np.uint8(min(1.0, 0.5 + t) * 255.0 + 0.5)
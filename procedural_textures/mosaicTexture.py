@@ -2,66 +2,109 @@
 Class for procedural mosaic texture, child of illumination model class
 """
 
-import random
 import math
+import numpy as np
+from numba import njit, prange
+from core import cudaTraversal
 from core.color import Color
+from procedural_textures import cudaTextures
 from scene.illuminationModel import IlluminationModel
 
 
 class MosaicTexture(IlluminationModel):
-    def __init__(self, cell_count=10, border_thickness=0.05, seed=42):
+    def __init__(self, cell_count=10, border_thickness=0.05, seed=42, use_gpu=True):
         self.cell_count = cell_count
         self.border_thickness = border_thickness
         self.seed = seed
+        self.use_gpu = use_gpu  # illuminate_batch runs on a CUDA device when one is available
 
     def illuminate(self, object_color, light_color,
                    normal, light, view, material, intersection_point):
+        return Color(*_mosaic(intersection_point.x, intersection_point.y,
+                              self.cell_count, self.border_thickness, self.seed))
 
-        # 1) map to cell‐space
-        u = intersection_point.x * self.cell_count
-        v = intersection_point.y * self.cell_count
-        cell_x = math.floor(u)
-        cell_y = math.floor(v)
+    def illuminate_batch(self, points):
+        """
+        Mosaic colors for many hit points at once, the cells are evaluated in parallel over the points
+        on the GPU if possible, otherwise on all CPU cores.
+        :param points: (N, 3) array of intersection points, x and y are used as texture coordinates.
+        :return: (N, 3) float32 array of RGB colors.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if self.use_gpu and cudaTraversal.available():
+            return cudaTextures.mosaic_batch(points[:, 0], points[:, 1], self.cell_count, self.border_thickness,
+                                             self.seed)
+        out = np.empty((len(points), 3), dtype=np.float32)
+        _mosaic_batch(points[:, 0], points[:, 1], self.cell_count, self.border_thickness, self.seed, out)
+        return out
 
-        min_d, second_d = float('inf'), float('inf')
-        chosen_color = Color(0,0,0)
 
-        # 2) site of nearest + 2nd-nearest in this cell + neighbors
-        for ix in range(cell_x-1, cell_x+2):
-            for iy in range(cell_y-1, cell_y+2):
-                h = (ix*73856093 + iy*19349663 + self.seed) & 0xFFFFFFFF
-                rng = random.Random(h)
+@njit(nogil=True, cache=True)
+def _mix(h):
+    """
+    Integer hash (lowbias32) of a 32-bit value, used instead of seeding a random.Random per cell.
+    :return: Hashed 32-bit value.
+    """
+    h ^= h >> 16
+    h = (h * 0x7feb352d) & 0xFFFFFFFF
+    h ^= h >> 15
+    h = (h * 0x846ca68b) & 0xFFFFFFFF
+    h ^= h >> 16
+    return h
 
-                # pick its site globally
-                sx = ix + rng.random()
-                sy = iy + rng.random()
 
+@njit(nogil=True, cache=True)
+def _mosaic(x, y, cell_count, border_thickness, seed):
+    """
+    Voronoi mosaic color at texture coordinates (x, y).
+    :return: Tuple (r, g, b).
+    """
+    # 1) map to cell‐space
+    u = x * cell_count
+    v = y * cell_count
+    cell_x = math.floor(u)
+    cell_y = math.floor(v)
+
+    min_d, second_d = math.inf, math.inf
+    chosen_r, chosen_g, chosen_b = 0.0, 0.0, 0.0
+
+    # 2) site of nearest + 2nd-nearest in this cell + neighbors
+    for ix in range(cell_x-1, cell_x+2):
+        for iy in range(cell_y-1, cell_y+2):
+            # five uniforms per cell from successive hashes of the cell index
+            h = _mix((ix*73856093 ^ iy*19349663 ^ seed) & 0xFFFFFFFF)
+            sx = ix + h / 4294967296.0
+            h = _mix(h)
+            sy = iy + h / 4294967296.0
+
+            d = math.hypot(u - sx, v - sy)
+            if d < min_d:
+                second_d, min_d = min_d, d
                 # *** clamp random colors to [0.1, 0.8] for deeper tones ***
-                color = Color(
-                    rng.uniform(0.1, 0.8),
-                    rng.uniform(0.1, 0.8),
-                    rng.uniform(0.1, 0.8)
-                )
-
-                d = math.hypot(u - sx, v - sy)
-                if d < min_d:
-                    second_d, min_d = min_d, d
-                    chosen_color = color
-                elif d < second_d:
-                    second_d = d
-
-        # 3) border vs fill
-        if (second_d - min_d) < self.border_thickness:
-            return Color(0.05, 0.05, 0.05)
-
-        # 4) simple contrast boost around mid-gray
-        def boost(c):
-            # c in [0,1] → remap so values <0.5 go darker, >0.5 go brighter
-            contrast = 1.5
-            return max(0.0, min(1.0, (c - 0.5)*contrast + 0.5))
-
-        return Color(
-            boost(chosen_color.rgb[0]),
-            boost(chosen_color.rgb[1]),
-            boost(chosen_color.rgb[2])
-        )
+                h = _mix(h)
+                chosen_r = 0.1 + 0.7 * (h / 4294967296.0)
+                h = _mix(h)
+                chosen_g = 0.1 + 0.7 * (h / 4294967296.0)
+                h = _mix(h)
+                chosen_b = 0.1 + 0.7 * (h / 4294967296.0)
+            elif d < second_d:
+                second_d = d
+
+    # 3) border vs fill
+    if (second_d - min_d) < border_thickness:
+        return 0.05, 0.05, 0.05
+
+    # 4) simple contrast boost around mid-gray, values <0.5 go darker, >0.5 go brighter
+    contrast = 1.5
+    return (max(0.0, min(1.0, (chosen_r - 0.5)*contrast + 0.5)),
+            max(0.0, min(1.0, (chosen_g - 0.5)*contrast + 0.5)),
+            max(0.0, min(1.0, (chosen_b - 0.5)*contrast + 0.5)))
+
+
+@njit(parallel=True, cache=True)
+def _mosaic_batch(xs, ys, cell_count, border_thickness, seed, out):
+    """
+    Mosaic colors of many texture coordinates, written to the rows of out.
+    """
+    for i in prange(xs.shape[0]):
+        out[i, 0], out[i, 1], out[i, 2] = _mosaic(xs[i], ys[i], cell_count, border_thickness, seed)
@@ -17,6 +17,15 @@ class BlinnPhongIllumination(IlluminationModel):
         """
             Blinn-Phong illumination model.
         """
+        ad, spec = self.illuminate_split(object_color, light_color, normal, light, view, material,
+                                         intersection_point)
+        return ad + spec
+
+    def illuminate_split(self, object_color, light_color, normal, light, view, material, intersection_point):
+        """
+            Blinn-Phong ambient + diffuse and specular light, each term computed once.
+            :return: Tuple of Colors (ambient + diffuse, specular)
+        """
         ambient_factor = self.ambient
         diffuse_factor = self.diffuse
         specular_factor = self.specular
@@ -53,13 +62,6 @@ class BlinnPhongIllumination(IlluminationModel):
             specular_intensity * specular_factor * specular_b * light_b
         )
 
-        # Final color
-        final_color = (
-            ambient[0] + diffuse[0] + specular[0],
-            ambient[1] + diffuse[1] + specular[1],
-            ambient[2] + diffuse[2] + specular[2]
-        )
-
-        return Color(*final_color)
+        return Color(ambient[0] + diffuse[0], ambient[1] + diffuse[1], ambient[2] + diffuse[2]), Color(*specular)
 
 
@@ -3,8 +3,42 @@ Camera has a position, lookAt, up, and render(world) method
 Responsible for ray tracing
 """
 
+import math
+import multiprocessing
+import numba
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from core.ray import Ray
+from core.vector import Vector
+
+# World of a render worker process, set once by _init_worker instead of being sent with every tile
+_worker_world = None
+
+
+def halton(index, base):
+    """
+    Element of the Halton low-discrepancy sequence.
+    :param index: Position in the sequence, 0 gives 0
+    :param base: Prime base of the sequence
+    :return: Value in [0, 1)
+    """
+    result, f = 0.0, 1.0
+    while index > 0:
+        f /= base
+        result += f * (index % base)
+        index //= base
+    return result
+
+
+def sample_offsets(samples):
+    """
+    Sub-pixel sample positions from the Halton (2, 3) sequence, relative to the pixel center.
+    The first sample is the pixel center itself.
+    :param samples: Number of samples per pixel
+    :return: (samples, 2) array of (x, y) offsets in [-0.5, 0.5)
+    """
+    offsets = np.array([(halton(i, 2), halton(i, 3)) for i in range(1, samples)]).reshape(-1, 2) - 0.5
+    return np.vstack(([0.0, 0.0], offsets))
 
 
 class Camera:
@@ -26,28 +60,110 @@ class Camera:
         self.film_height = 2.0 * np.tan(np.radians(self.fov / 2.0))
         self.film_width = self.film_height * aspect_ratio
 
-    def render(self, world):
+        # Normalized direction through the center of every pixel, (H, W, 3)
+        self.primary_dirs = self.pixel_directions()
+
+    def render(self, world, workers=1, tile_size=32, samples=1, edge_threshold=0.1):
         """
         Render the scene from the camera's perspective.
         :param world: World object containing the scene
+        :param workers: Number of worker processes, 1 renders in this process. Workers are spawned, so scripts
+                        rendering with more than one need an if __name__ == '__main__' guard
+        :param tile_size: Width and height in pixels of the tiles the rays are traced in
+        :param samples: Samples per pixel on edges found after the first pass, 1 disables super-sampling
+        :param edge_threshold: Summed RGB difference to a neighbour above which a pixel is an edge
         :return: Rendered image as a numpy array
         """
-        image = np.zeros((self.height, self.width, 3))  # RGB image
-
-        for y in range(self.height):
-            for x in range(self.width):
-                color = np.zeros(3)  # Initialize color for the pixel
+        # RGB image, every pixel is written below so the buffer is left uninitialized
+        pixels = np.empty((self.height * self.width, 3), dtype=np.float32)
+        image = pixels.reshape(self.height, self.width, 3)
 
-                # Toggle available - normal or super sampling
+        # Normal sampling, all primary rays are traced as one batch
+        origins, directions = self.generate_rays()
+        if workers <= 1:
+            # Tile-major order, neighbouring rays walk the same KD-tree nodes while they are still in cache
+            order = self.tile_order(tile_size)
+            pixels[order] = world.spawn_primary_rays(origins[order], directions[order])
+        else:
+            # Tiles are handed out one at a time so workers that finish early pick up the remaining ones
+            tiles = list(self.tiles(tile_size))
+            indices = np.arange(self.height * self.width).reshape(self.height, self.width)
+            tasks = []
+            for y0, y1, x0, x1 in tiles:
+                index = indices[y0:y1, x0:x1].ravel()
+                tasks.append((origins[index], directions[index]))
 
-                # Normal sampling
-                image[y, x] = self.normal_sampling(x, y, color, world)
+            # Workers are spawned rather than forked, numba's thread pool does not survive a fork once it has run
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_worker, initargs=(world,)) as executor:
+                for (y0, y1, x0, x1), colors in zip(tiles, executor.map(_render_tile, tasks, chunksize=1)):
+                    image[y0:y1, x0:x1] = colors.reshape(y1 - y0, x1 - x0, 3)
 
-                # # Super-sampling (will take longer to render)
-                # image[y, x] = self.super_sampling(x, y, color, world)
+        # Adaptive super-sampling, only pixels on edges get the extra rays
+        if samples > 1:
+            self.refine_edges(world, image, samples, edge_threshold)
 
         return image
 
+    @staticmethod
+    def edge_mask(image, threshold):
+        """
+        Flag pixels whose color differs from a horizontal or vertical neighbour.
+        :param image: (H, W, 3) array
+        :param threshold: Summed absolute RGB difference that makes both neighbours edge pixels
+        :return: (H, W) boolean array
+        """
+        mask = np.zeros(image.shape[:2], dtype=np.bool_)
+        dy = np.abs(np.diff(image, axis=0)).sum(axis=-1) > threshold
+        dx = np.abs(np.diff(image, axis=1)).sum(axis=-1) > threshold
+        mask[1:] |= dy
+        mask[:-1] |= dy
+        mask[:, 1:] |= dx
+        mask[:, :-1] |= dx
+        return mask
+
+    def refine_edges(self, world, image, samples, threshold):
+        """
+        Trace samples - 1 extra rays at Halton offsets through every edge pixel and average them into the image.
+        :param world: World object containing the scene
+        :param image: (H, W, 3) image of the first pass, updated in place
+        :param samples: Samples per edge pixel, including the one already traced through the center
+        :param threshold: Edge threshold, see edge_mask
+        :return: Number of refined pixels
+        """
+        ys, xs = np.nonzero(self.edge_mask(image, threshold))
+        if len(xs) == 0:
+            return 0
+
+        offsets = sample_offsets(samples)[1:]
+        directions = self.sample_directions((xs[:, None] + offsets[:, 0]).ravel(),
+                                            (ys[:, None] + offsets[:, 1]).ravel())
+        origins = np.empty_like(directions)
+        origins[:] = (self.position.x, self.position.y, self.position.z)
+
+        colors = world.spawn_primary_rays(origins, directions).reshape(len(xs), samples - 1, 3)
+        image[ys, xs] = (image[ys, xs] + colors.sum(axis=1)) / samples
+        return len(xs)
+
+    def tiles(self, tile_size):
+        """
+        Split the image into square tiles, the last row and column of tiles may be smaller.
+        :param tile_size: Width and height of a tile in pixels
+        :return: Generator of (y0, y1, x0, x1) pixel ranges
+        """
+        for y0 in range(0, self.height, tile_size):
+            for x0 in range(0, self.width, tile_size):
+                yield y0, min(y0 + tile_size, self.height), x0, min(x0 + tile_size, self.width)
+
+    def tile_order(self, tile_size):
+        """
+        Row-major pixel indices reordered tile by tile, row-major within each tile.
+        :param tile_size: Width and height of a tile in pixels
+        :return: (height * width,) integer array, a permutation of the pixel indices
+        """
+        pixels = np.arange(self.height * self.width).reshape(self.height, self.width)
+        return np.concatenate([pixels[y0:y1, x0:x1].ravel() for y0, y1, x0, x1 in self.tiles(tile_size)])
+
     def normal_sampling(self, x, y, color, world):
         """
         Normal sampling for ray tracing
@@ -70,11 +186,11 @@ class Camera:
         :param world: World object containing the scene
         :return: Color value for the pixel
         """
-        for i in range(2):
-            for j in range(2):
-                ray = self.generate_ray(x + i / 2, y + j / 2)
-                color += world.spawn_ray(ray).rgb
-        return color / 4
+        offsets = sample_offsets(4)
+        for dx, dy in offsets.tolist():
+            ray = self.generate_ray(x + dx, y + dy)
+            color += world.spawn_ray(ray).rgb
+        return color / len(offsets)
 
     def view_matrix(self):
         """
@@ -105,18 +221,76 @@ class Camera:
         :param y: y-coordinate of the pixel
         :return: Ray object
         """
+        if isinstance(x, int) and isinstance(y, int):
+            # Pixel centers are precomputed
+            return Ray(self.position, Vector(*self.primary_dirs[y, x].tolist()), normalize=False)
+
         u = (x + 0.5) / self.width * self.film_width - self.film_width / 2.0
         v = (y + 0.5) / self.height * self.film_height - self.film_height / 2.0
 
-        # Ray direction
+        # Ray direction, the basis is orthonormal so its length is sqrt(1 + u^2 + v^2)
         direction = self.forward + self.right * u + self.up * v
         ray_origin = self.position  # Camera position (eye)
 
         # Normalize the direction vector
-        ray_direction = direction.normalize()
+        ray_direction = direction * (1.0 / math.sqrt(1.0 + u * u + v * v))
 
         # Return the ray
-        return Ray(ray_origin, ray_direction)
+        return Ray(ray_origin, ray_direction, normalize=False)
+
+    def pixel_directions(self):
+        """
+        Directions of the rays through the center of every pixel, one broadcast expression instead of H*W calls.
+        :return: (H, W, 3) array of normalized directions
+        """
+        return self.sample_directions(np.arange(self.width)[None, :], np.arange(self.height)[:, None])
+
+    def sample_directions(self, xs, ys):
+        """
+        Directions of the rays through image positions given in pixels, same mapping as generate_ray.
+        :param xs: Array of x coordinates, x is the center of pixel x
+        :param ys: Array of y coordinates broadcastable with xs
+        :return: Array of normalized directions with the broadcast shape of xs and ys plus a last axis of 3
+        """
+        us = (xs + 0.5) / self.width * self.film_width - self.film_width / 2.0
+        vs = (ys + 0.5) / self.height * self.film_height - self.film_height / 2.0
+
+        forward = np.array(self.forward.to_tuple())
+        right = np.array(self.right.to_tuple())
+        up = np.array(self.up.to_tuple())
+
+        # forward, right and up are orthonormal, the length only depends on us and vs
+        directions = forward + right * us[..., None] + up * vs[..., None]
+        directions *= (1.0 / np.sqrt(1.0 + us * us + vs * vs))[..., None]
+        return directions
+
+    def generate_rays(self):
+        """
+        Generate the primary rays through the center of every pixel at once.
+        :return: Tuple of (H*W, 3) arrays (origins, directions) in row-major pixel order
+        """
+        directions = self.primary_dirs.reshape(-1, 3)
+
+        origins = np.empty_like(directions)
+        origins[:] = (self.position.x, self.position.y, self.position.z)
+        return origins, directions
+
 
+def _init_worker(world):
+    """
+    Keep the world in the worker process, every tile is rendered against it.
+    Numba runs single threaded here, the processes already use all cores.
+    """
+    global _worker_world
+    _worker_world = world
+    numba.set_num_threads(1)
 
 
+def _render_tile(task):
+    """
+    Trace the primary rays of one tile in a worker process.
+    :param task: Tuple (origins, directions)
+    :return: (N, 3) array of RGB values
+    """
+    origins, directions = task
+    return _worker_world.spawn_primary_rays(origins, directions)
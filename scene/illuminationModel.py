@@ -2,6 +2,8 @@
 Class storing illumination models
 """
 
+from core.color import Color
+
 
 class IlluminationModel:
     """
@@ -9,3 +11,30 @@ class IlluminationModel:
     """
     def illuminate(self, object_color, light_color, normal, light, view, material, intersection_point):
         raise NotImplementedError("Subclasses should implement this method.")
+
+    def illuminate_split(self, object_color, light_color, normal, light, view, material, intersection_point):
+        """
+        Local illumination split into the part lit by the object color and the specular highlight.
+        This default calls illuminate twice, once without specular and once with only specular color.
+        :param material: dict with 'ambient_color' and 'specular_color'
+        :return: Tuple of Colors (ambient + diffuse, specular)
+        """
+        black = Color(0, 0, 0)
+        ad = self.illuminate(object_color, light_color, normal, light, view,
+                             {'ambient_color': material['ambient_color'], 'specular_color': black},
+                             intersection_point)
+        spec = self.illuminate(black, light_color, normal, light, view,
+                               {'ambient_color': black, 'specular_color': material['specular_color']},
+                               intersection_point)
+        return ad, spec
+
+    def illuminate_split_batch(self, points):
+        """
+        illuminate_split for many hit points at once, for models whose color only depends on the hit point
+        (textures, which define illuminate_batch). Such models ignore the material, so the default illuminate_split
+        returns their color twice.
+        :param points: (N, 3) array of intersection points
+        :return: Tuple of (N, 3) arrays (ambient + diffuse, specular)
+        """
+        colors = self.illuminate_batch(points)
+        return colors, colors
@@ -4,6 +4,9 @@ import numpy as np
 from PIL import Image
 import os
 
+# Texels kept by ImageTexture.illuminate before its cache is cleared
+TEXEL_CACHE_SIZE = 65536
+
 
 class ImageTexture(IlluminationModel):
     """
@@ -17,6 +20,12 @@ class ImageTexture(IlluminationModel):
         # Store as float32 array in [0,1]
         self.tex = np.asarray(img, dtype=np.float32) / 255.0
         self.height, self.width, _ = self.tex.shape
+        # Largest texel indices, UVs in [0, 1) are scaled by these
+        self.w1 = self.width - 1
+        self.h1 = self.height - 1
+        # (r, g, b) tuples of texels already read, keyed by (row, column);
+        # neighbouring hits on flat geometry keep landing on the same texels
+        self._texels = {}
 
     def illuminate(self,
                    object_color: Color,
@@ -31,9 +40,24 @@ class ImageTexture(IlluminationModel):
         v = intersection_point.y % 1.0
 
         # Convert to pixel indices
-        px = int(u * (self.width - 1))
-        py = int((1.0 - v) * (self.height - 1))  # flip v so 0 is bottom
+        px = int(u * self.w1)
+        py = int((1.0 - v) * self.h1)  # flip v so 0 is bottom
+
+        # Sample normalized array, as Python floats so the shading math stays off numpy scalars
+        rgb = self._texels.get((py, px))
+        if rgb is None:
+            if len(self._texels) >= TEXEL_CACHE_SIZE:
+                self._texels.clear()
+            rgb = self._texels[py, px] = tuple(self.tex[py, px].tolist())
+        return Color(*rgb)
 
-        # Sample normalized array
-        r, g, b = self.tex[py, px]
-        return Color(r, g, b)
+    def illuminate_batch(self, points):
+        """
+        Texture colors for many hit points at once, one fancy index into the texture.
+        :param points: (N, 3) array of intersection points, x and y are used as UV coordinates.
+        :return: (N, 3) float32 array of RGB colors.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        px = (np.mod(points[:, 0], 1.0) * self.w1).astype(np.intp)
+        py = ((1.0 - np.mod(points[:, 1], 1.0)) * self.h1).astype(np.intp)
+        return self.tex[py, px]
@@ -1,3 +1,5 @@
+import math
+from numba import njit
 from scene.illuminationModel import IlluminationModel
 from core.color import Color
 
@@ -24,47 +26,56 @@ class PhongIllumination(IlluminationModel):
             :param intersection_point: Intersection point of the object (Point object)
             :return: Color of the object after illumination (Color object)
         """
-        ambient_factor = self.ambient
-        diffuse_factor = self.diffuse
-        specular_factor = self.specular
-        specular_exponent = self.specular_exponent
+        ad_r, ad_g, ad_b, spec_r, spec_g, spec_b = self._terms(object_color, light_color, normal, light, view,
+                                                               material)
+        return Color(ad_r + spec_r, ad_g + spec_g, ad_b + spec_b)
 
-        # Extract RGB components
+    def illuminate_split(self, object_color, light_color, normal, light, view, material, intersection_point):
+        """
+        Ambient + diffuse and specular light from a single evaluation of the Phong terms.
+        :return: Tuple of Colors (ambient + diffuse, specular)
+        """
+        ad_r, ad_g, ad_b, spec_r, spec_g, spec_b = self._terms(object_color, light_color, normal, light, view,
+                                                               material)
+        return Color(ad_r, ad_g, ad_b), Color(spec_r, spec_g, spec_b)
+
+    def _terms(self, object_color, light_color, normal, light, view, material):
+        # Unpack to floats, the math runs in the jitted _phong
         object_r, object_g, object_b = object_color
         light_r, light_g, light_b = light_color
         ambient_r, ambient_g, ambient_b = material['ambient_color']
         specular_r, specular_g, specular_b = material['specular_color']
 
-        # Ambient light
-        ambient = (
-            ambient_factor * ambient_r * object_r,
-            ambient_factor * ambient_g * object_g,
-            ambient_factor * ambient_b * object_b
-        )
+        return _phong(object_r, object_g, object_b, light_r, light_g, light_b,
+                      normal.x, normal.y, normal.z, light.x, light.y, light.z, view.x, view.y, view.z,
+                      ambient_r, ambient_g, ambient_b, specular_r, specular_g, specular_b,
+                      float(self.ambient), float(self.diffuse), float(self.specular),
+                      float(self.specular_exponent))
 
-        # Diffuse light
-        light_dir = light.normalize()
-        diffuse_intensity = max(normal.dot(light_dir), 0)
-        diffuse = (
-            diffuse_intensity * diffuse_factor * object_r * light_r,
-            diffuse_intensity * diffuse_factor * object_g * light_g,
-            diffuse_intensity * diffuse_factor * object_b * light_b
-        )
 
-        # Specular light
-        reflection = 2 * normal.dot(light_dir) * normal - light_dir
-        specular_intensity = max(reflection.dot(view), 0) ** specular_exponent
-        specular = (
-            specular_intensity * specular_factor * specular_r * light_r,
-            specular_intensity * specular_factor * specular_g * light_g,
-            specular_intensity * specular_factor * specular_b * light_b
-        )
+@njit(cache=True, fastmath=True)
+def _phong(object_r, object_g, object_b, light_r, light_g, light_b, nx, ny, nz, lx, ly, lz, vx, vy, vz,
+           ambient_r, ambient_g, ambient_b, specular_r, specular_g, specular_b,
+           ambient_factor, diffuse_factor, specular_factor, specular_exponent):
+    """
+    Phong terms on scalars, the normal and view direction are unit vectors.
+    :return: Tuple (r, g, b) of ambient + diffuse light followed by (r, g, b) of specular light
+    """
+    # Diffuse light, light direction normalized inline; a zero vector stays zero like in Vector.normalize
+    length = math.sqrt(lx * lx + ly * ly + lz * lz)
+    if length > 0.0:
+        lx, ly, lz = lx / length, ly / length, lz / length
+    n_dot_l = nx * lx + ny * ly + nz * lz  # Shared by the diffuse and specular terms
+    diffuse_intensity = max(n_dot_l, 0.0)
 
-        # Final color
-        final_color = (
-            ambient[0] + diffuse[0] + specular[0],
-            ambient[1] + diffuse[1] + specular[1],
-            ambient[2] + diffuse[2] + specular[2]
-        )
+    # Specular light, reflection of the light direction about the normal
+    rx, ry, rz = 2 * n_dot_l * nx - lx, 2 * n_dot_l * ny - ly, 2 * n_dot_l * nz - lz
+    specular_intensity = max(rx * vx + ry * vy + rz * vz, 0.0) ** specular_exponent
 
-        return Color(*final_color)
+    # Ambient + diffuse, then specular
+    return (ambient_factor * ambient_r * object_r + diffuse_intensity * diffuse_factor * object_r * light_r,
+            ambient_factor * ambient_g * object_g + diffuse_intensity * diffuse_factor * object_g * light_g,
+            ambient_factor * ambient_b * object_b + diffuse_intensity * diffuse_factor * object_b * light_b,
+            specular_intensity * specular_factor * specular_r * light_r,
+            specular_intensity * specular_factor * specular_g * light_g,
+            specular_intensity * specular_factor * specular_b * light_b)
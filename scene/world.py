@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from core.color import Color
 import numpy as np
-import random
 import math
+from numba import njit
 
 from objects.polygon import Polygon
+from objects.triangleMesh import TriangleMesh
 
 from core.ray import Ray
 from core.point import Point
@@ -14,6 +15,14 @@ from core.kdTree import KDTree
 
 
 MAX_DEPTH = 5  # Min 2 needed to see reflection
+MIN_RAY_WEIGHT = 0.02  # Secondary rays weighted below this are not traced
+MIN_THROUGHPUT = 1e-3  # Paths whose accumulated weight drops below this are culled
+
+# generic “Phong-like” material colors for .illuminate calls
+SHADING_MATERIAL = {
+    'ambient_color': Color(0.1, 0.1, 0.1),
+    'specular_color': Color(1.0, 1.0, 1.0)
+}
 
 
 class World:
@@ -36,6 +45,21 @@ class World:
         self.objects.extend(obj)
         self.rebuild_tree()  # Only rebuild once after adding objects
 
+    def add_mesh(self, vertices, faces, color, normals=None, kr=0.0, kt=0.0, material=None,
+                 illumination_model='phong'):
+        """
+        Add a triangle mesh given as flat arrays, all triangles share one color and material.
+        :param vertices: (V, 3) array of vertex positions
+        :param faces: (F, 3) array of vertex indices per triangle
+        :param color: Color of the mesh
+        :param normals: Optional (F, 3) array of face normals
+        :return: The TriangleMesh added to the world
+        """
+        mesh = TriangleMesh(vertices, faces, color, normals=normals, kr=kr, kt=kt, material=material,
+                            illumination_model=illumination_model)
+        self.add(mesh)
+        return mesh
+
     def rebuild_tree(self):
         """Rebuild KD-tree only when needed"""
         self.kd_tree = KDTree(self.objects) if self.objects else None
@@ -72,220 +96,289 @@ class World:
         mirror‐reflection, and refraction—while keeping the first‐bounce
         specular highlight at full strength.
         """
+        return Color(*self._spawn_ray_rgb(ray, depth))
+
+    def _spawn_ray_rgb(self, ray, depth=1):
+        """
+        spawn_ray without the Color wrapper, secondary rays pass plain (r, g, b) tuples of floats around.
+        :return: (r, g, b) tuple
+        """
         # 0) recursion guard
         if depth > MAX_DEPTH:
-            return self.background_color
+            return self.background_color.rgb
 
         # 1) intersection
         if not hasattr(self, 'kd_tree') or self.kd_tree is None:
-            return self.background_color
+            return self.background_color.rgb
         hit = self.kd_tree.intersect(ray)
         if not hit:
-            return self.background_color
+            return self.background_color.rgb
 
-        obj = hit['object']
-        P = ray.origin + ray.direction * hit['t']
-        N = self.calculate_normal(obj, P)
-        view_dir = (ray.origin - P).normalize()
-        light_dir = (self.light_source['position'] - P).normalize()
+        return self._shade_rgb(ray, hit, depth)
 
-        # 2) shadow factor (opaque → 0, transparent attenuate)
-        shadow_ray = Ray(P + N * 1e-4, light_dir, space=obj)
+    def spawn_primary_rays(self, origins, directions):
+        """
+        Trace a batch of primary rays. Intersections are found for all rays in one KD-tree call,
+        then each hit is shaded, textured hits in one batch per texture.
+        :param origins: (N, 3) array of ray origins
+        :param directions: (N, 3) array of normalized ray directions
+        :return: (N, 3) float32 array of RGB values
+        """
+        if self.kd_tree is None:
+            return np.tile(np.array(self.background_color.rgb, dtype=np.float32), (len(directions), 1))
+
+        t, index, beta, gamma, pending = self.kd_tree.intersect_batch(origins, directions)
+
+        # rgb tuples are collected in a list and converted once at the end
+        colors = [self.background_color.rgb] * len(directions)
+
+        # Hits are shaded after their shadow rays have been traced as one batch, rays that reached objects
+        # without a compiled intersection test are intersected one by one first
+        hits = []
+        rays = zip(origins.tolist(), directions.tolist(), t.tolist(), index.tolist(), beta.tolist(), gamma.tolist(),
+                   pending.tolist())
+        for i, (origin, direction, t_i, index_i, beta_i, gamma_i, pending_i) in enumerate(rays):
+            if index_i < 0 and not pending_i:
+                continue
+            ray = Ray(Point(*origin), Vector(*direction), normalize=False)
+            if pending_i:
+                hit = self.kd_tree.intersect(ray)
+                if not hit:
+                    continue
+            else:
+                hit = self.kd_tree.hit_info(ray, index_i, t_i, beta_i, gamma_i)
+            hits.append((i, ray, hit, self._shading_frame(ray, hit)))
+
+        shadows = self.shadow_factors([frame[-1] for _, _, _, frame in hits])
+
+        # Opaque, non-reflective hits on textures are colored by one illuminate_batch call per texture,
+        # the other hits are shaded one by one
+        textured = {}
+        for (i, ray, hit, frame), shadow in zip(hits, shadows):
+            obj = hit['object']
+            model = obj.illumination_model
+            if obj.kr <= 0 and obj.kt <= 0 and hasattr(model, 'illuminate_batch'):
+                textured.setdefault(id(model), (model, []))[1].append((i, frame[1], shadow))
+            else:
+                colors[i] = self._shade_rgb(ray, hit, 1, frame, shadow)
+
+        colors = np.array(colors, dtype=np.float32)
+        for model, entries in textured.values():
+            index = np.array([i for i, _, _ in entries])
+            points = np.array([(P.x, P.y, P.z) for _, P, _ in entries])
+            shadow = np.array([shadow for _, _, shadow in entries])[:, None]
+            # Same terms as _local_rgb for such hits, shadowed direct light clamped to [0, 1]
+            ad, spec = model.illuminate_split_batch(points)
+            colors[index] = np.clip((ad + spec) * shadow, 0.0, 1.0)
+        return colors
+
+    def shadow_factor(self, shadow_ray):
+        """
+        Light reaching the origin of a shadow ray: 1 if nothing blocks it, 0 behind an opaque object and 1 - kt
+        behind a transparent one.
+        :param shadow_ray: Ray towards the light, its space is the surface it leaves
+        :return: Shadow factor
+        """
         blocker = self.kd_tree.intersect(shadow_ray)
-        if blocker and blocker['object'] is not obj:
+        if blocker and self.surface(blocker) != shadow_ray.space:
             blk = blocker['object']
-            shadow = 0.0 if blk.kt == 0 else (1.0 - blk.kt)
-        else:
+            return 0.0 if blk.kt == 0 else (1.0 - blk.kt)
+        return 1.0
+
+    def shadow_factors(self, shadow_rays):
+        """
+        shadow_factor for many shadow rays, traced in one KD-tree batch. Rays that reached objects without
+        a compiled intersection test fall back to shadow_factor.
+        :param shadow_rays: List of Rays towards the light
+        :return: List of shadow factors
+        """
+        if not shadow_rays:
+            return []
+        origins = np.array([(ray._ox, ray._oy, ray._oz) for ray in shadow_rays])
+        directions = np.array([(ray._dx, ray._dy, ray._dz) for ray in shadow_rays])
+        _, index, _, _, pending = self.kd_tree.intersect_batch(origins, directions,
+                                                              [ray.space for ray in shadow_rays])
+
+        factors = []
+        for ray, i, is_pending in zip(shadow_rays, index.tolist(), pending.tolist()):
+            if is_pending:
+                factors.append(self.shadow_factor(ray))
+                continue
             shadow = 1.0
+            if i >= 0:
+                # Triangles of a composite object (e.g. Cuboid) take their transparency from the object
+                blk = self.kd_tree.primitives[i]
+                blk = getattr(blk, 'parent', None) or blk
+                face = int(self.kd_tree.faces[i])
+                if ((blk, face) if face >= 0 else blk) != ray.space:
+                    shadow = 0.0 if blk.kt == 0 else (1.0 - blk.kt)
+            factors.append(shadow)
+        return factors
+
+    def shade(self, ray, hit, depth=1):
+        """
+        Shade a ray-object intersection: local illumination, shadows, reflection and refraction.
+        :param ray: Ray that produced the hit
+        :param hit: Hit dictionary returned by the KD-tree
+        :param depth: Recursion depth
+        :return: Color of the hit
+        """
+        return Color(*self._shade_rgb(ray, hit, depth))
 
-        # generic “Phong-like” material colors for .illuminate calls
-        mat = {
-            'ambient_color': Color(0.1, 0.1, 0.1),
-            'specular_color': Color(1.0, 1.0, 1.0)
-        }
+    def _shading_frame(self, ray, hit):
+        """
+        Geometry of a hit used for shading.
+        :return: Tuple (space, P, N, view_dir, light_dir, shadow_ray)
+        """
+        # Surface that was hit, triangles of a mesh are told apart by their face index
+        space = self.surface(hit)
+        P = ray.origin + ray.direction * hit['t']
+        N = self.calculate_normal(hit['object'], P, hit.get('face'))
+        view_dir = (ray.origin - P).normalize()
+        light_dir = (self.light_source['position'] - P).normalize()
+        shadow_ray = Ray(P + N * 1e-4, light_dir, space=space, normalize=False)
+        return space, P, N, view_dir, light_dir, shadow_ray
+
+    def _shade_rgb(self, ray, hit, depth=1, frame=None, shadow=None):
+        """
+        shade without the Color wrapper. Secondary rays are traced from an explicit stack instead of by recursion:
+        every hit on the stack keeps its color so far, its pending child rays and the throughput of its path,
+        the product of the weights from the first hit on. A finished hit is clamped and added to its parent.
+        :param frame: _shading_frame of the hit if already computed
+        :param shadow: Shadow factor if already computed, e.g. by shadow_factors
+        :return: (r, g, b) tuple
+        """
+        r, g, b, children = self._local_rgb(ray, hit, depth, frame, shadow)
+        if not children:
+            return min(1, max(0, r)), min(1, max(0, g)), min(1, max(0, b))
+
+        # [r, g, b, children, weight, throughput] per hit
+        stack = [[r, g, b, children, 1.0, 1.0]]
+        while True:
+            top = stack[-1]
+            if top[3]:
+                ray, weight = top[3].pop()
+                throughput = top[5] * weight
+                if throughput < MIN_THROUGHPUT:
+                    # the path can no longer change the pixel
+                    continue
+                hit = self.kd_tree.intersect(ray)
+                if hit:
+                    r, g, b, children = self._local_rgb(ray, hit, depth + len(stack))
+                    stack.append([r, g, b, children, weight, throughput])
+                    continue
+                r, g, b = self.background_color.rgb
+            else:
+                # all child rays are in, final composition clamped to [0, 1]
+                stack.pop()
+                r, g, b = min(1, max(0, top[0])), min(1, max(0, top[1])), min(1, max(0, top[2]))
+                if not stack:
+                    return r, g, b
+                weight = top[4]
+            parent = stack[-1]
+            parent[0] += r * weight
+            parent[1] += g * weight
+            parent[2] += b * weight
+
+    def _local_rgb(self, ray, hit, depth, frame=None, shadow=None):
+        """
+        Direct lighting of a hit plus the secondary rays it spawns.
+        :return: Tuple (r, g, b, children), children is a list of (ray, weight) pairs whose colors are to be added
+                 to (r, g, b) scaled by weight. Rays past MAX_DEPTH are not built, their background is already added.
+        """
+        obj = hit['object']
+        space, P, N, view_dir, light_dir, shadow_ray = frame or self._shading_frame(ray, hit)
+
+        # 2) shadow factor (opaque → 0, transparent attenuate)
+        if shadow is None:
+            shadow = self.shadow_factor(shadow_ray)
 
         # 3) split the local illumination into two pieces:
         #    – ambient+diffuse, which we _do_ attenuate by transparency (except on first hit)
         #    – specular, which we leave at full strength on the first bounce
-        atten = 1.0 if depth == 1 else (1 - obj.kt)
-
-        # 3a) ambient+diffuse only, shadowed & transparency‐attenuated
-
-        ad_local = obj.illumination_model.illuminate(
+        ad_local, spec_local = obj.illumination_model.illuminate_split(
             obj.color,
             self.light_source['color'],
             N, light_dir, view_dir,
-            {
-                'ambient_color': mat['ambient_color'],
-                'specular_color': Color(0, 0, 0)
-            },
+            SHADING_MATERIAL,
             P
         )
-        ad_local = ad_local * shadow * atten
+
+        # opaque, non-reflective surfaces (most hits): shadowed direct light only, no secondary rays
+        kr, kt = obj.kr, obj.kt
+        if kr <= 0 and kt <= 0:
+            ad_r, ad_g, ad_b = ad_local.rgb
+            sp_r, sp_g, sp_b = spec_local.rgb
+            return (ad_r + sp_r) * shadow, (ad_g + sp_g) * shadow, (ad_b + sp_b) * shadow, []
+
+        atten = 1.0 if depth == 1 else (1 - kt)
+
+        # 3a) ambient+diffuse only, shadowed & transparency‐attenuated
+        ad_r, ad_g, ad_b = ad_local.rgb
+        ad_r, ad_g, ad_b = ad_r * shadow * atten, ad_g * shadow * atten, ad_b * shadow * atten
 
         # 3b) specular only, shadowed but NOT transparency‐attenuated
-        spec_local = obj.illumination_model.illuminate(
-            Color(0, 0, 0),
-            self.light_source['color'],
-            N, light_dir, view_dir,
-            {
-                'ambient_color': Color(0, 0, 0),
-                'specular_color': mat['specular_color']
-            },
-            P
-        )
-        spec_local = spec_local * shadow
+        sp_r, sp_g, sp_b = spec_local.rgb
+        sp_r, sp_g, sp_b = sp_r * shadow, sp_g * shadow, sp_b * shadow
 
         # 3c) combine direct lighting
-        if obj.kt > 0:
+        if kt > 0:
             # transparent surface: no diffuse, only specular
-            local = ad_local * (1 - obj.kt) + spec_local * obj.kt
+            r = ad_r * (1 - kt) + sp_r * kt
+            g = ad_g * (1 - kt) + sp_g * kt
+            b = ad_b * (1 - kt) + sp_b * kt
         else:
             # opaque surface: full Phong (diffuse + specular)
-            local = ad_local + spec_local
+            r, g, b = ad_r + sp_r, ad_g + sp_g, ad_b + sp_b
 
-        # 4) mirror‐style reflection
-        refl = Color(0, 0, 0)
-        if obj.kr > 0:
-            refl = self.basic_reflection(obj, P, N, ray, depth, Color(0, 0, 0))
+        children = []
+        background = self.background_color.rgb
+        past_depth = depth + 1 > MAX_DEPTH
+
+        # 4) mirror‐style reflection, blended over black by kr and then scaled by kr again in the composition
+        if kr > 0 and kt <= 0:
+            weight = kr * kr
+            if past_depth:
+                r, g, b = r + background[0] * weight, g + background[1] * weight, b + background[2] * weight
+            else:
+                reflect_dir = (ray.direction - N * (2 * ray.direction.dot(N))).normalize()
+                children.append((Ray(P + N * 0.001, reflect_dir, normalize=False), weight))
 
         # 5) refraction + Fresnel‐mix
-        refr = Color(0, 0, 0)
-        if obj.kt > 0:
-            def refract(I, Nn, n1, n2):
-                cos_i = -Nn.dot(I)
-                η = n1 / n2
-                sin2t = η * η * (1 - cos_i * cos_i)
-                if sin2t > 1.0:
-                    return None
-                cos_t = math.sqrt(1 - sin2t)
-                return (I * η + Nn * (η * cos_i - cos_t)).normalize()
-
-            # set up indices & normal flip if inside object
-            n1, n2 = 1.0, obj.material['refractive_index']
+        if kt > 0:
+            # set up the index ratio & normal flip if inside object, the cosine is computed once and reused below
+            η = obj.inv_refractive_index
             Nn = N
-            if N.dot(ray.direction) > 0:
-                Nn, n1, n2 = -N, n2, n1
-            cos_i = -Nn.dot(ray.direction)
-
-            # always trace a physical reflection for the Fresnel term
-            refl_o = P + Nn * 1e-4
-            refl_d = (ray.direction - 2 * ray.direction.dot(Nn) * Nn).normalize()
-            refl = self.spawn_ray(Ray(refl_o, refl_d, space=obj), depth + 1)
-
-            # then attempt actual refraction
-            rdir = refract(ray.direction, Nn, n1, n2)
-            if rdir is not None:
-                F0 = ((n1 - n2) / (n1 + n2)) ** 2
-                F = F0 + (1 - F0) * (1 - cos_i) ** 5
-
-                refr_o = P + rdir * 1e-4
-                refr = self.spawn_ray(Ray(refr_o, rdir, space=obj), depth + 1)
-
-                # Fresnel‐weight reflection vs. refraction
-                refl *= F
-                refr *= (1 - F)
-
-        # 6) final composition
-        #    – direct = ad_local + spec_local
-        #    – reflection scaled by kr
-        #    – refraction scaled by kt
-        color = local + refl * obj.kr + refr * obj.kt
-        return self.clamp_color(color)
-
-    def basic_reflection(self, obj, intersection_point, normal, ray, depth, illumination):
-        """
-        Basic reflection model. If the object has a kr (reflection coefficient), spawn a reflection ray.
-        :param obj: Object that was hit
-        :param intersection_point: Point of intersection of the ray with the object
-        :param normal: Normal at the intersection point
-        :param ray: Ray that hit the object
-        :param depth: Recursion depth
-        :param illumination: Current illumination color
-        :return: Illuminated color at the intersection point
-        """
-        if hasattr(obj, 'kr') and obj.kr > 0:
-            reflect_dir = (ray.direction - normal * (2 * ray.direction.dot(normal))).normalize()
-            reflect_ray = Ray(intersection_point + normal * 0.001, reflect_dir)
-            reflected_color = self.spawn_ray(reflect_ray, depth + 1)
-            illumination = illumination * (1 - obj.kr) + reflected_color * obj.kr
-
-        return illumination
-
-    def phong_brdf_reflection(self, obj, intersection_point, normal, ray, depth, illumination):
-        """
-        Phong BRDF reflection model. If the object has a kr (reflection coefficient), spawn multiple reflection rays.
-        It makes the reflection look rougher
-        :param obj: Object that was hit
-        :param intersection_point: Point of intersection of the ray with the object
-        :param normal: Normal at the intersection point
-        :param ray: Ray that hit the object
-        :param depth: Recursion depth
-        :param illumination: Current illumination color
-        :return: Illuminated color at the intersection point
-        """
-        if hasattr(obj, 'kr') and isinstance(obj.kr, (int, float)) and obj.kr > 0:
-            ideal_reflect_dir = ray.direction - normal * (2 * ray.direction.dot(normal))
-            ideal_reflect_dir = ideal_reflect_dir.normalize()  # Normalize ideal reflection direction
-
-            # Parameters for glossy reflection
-            num_rays = 5
-            phong_exponent = getattr(obj, 'shininess', 50)  # Control glossiness
-            reflection_color = Color(0, 0, 0)
-            total_weight = 0
-
-            for _ in range(num_rays):
-                # Sample direction around the reflection vector using Phong lobe
-                perturbed_dir = self.sample_phong_lobe(ideal_reflect_dir, phong_exponent)
-                perturbed_dir = perturbed_dir.normalize()  # Ensure perturbed direction is normalized
-
-                reflection_ray = Ray(intersection_point + normal * 1e-4, perturbed_dir)
-                sample_color = self.spawn_ray(reflection_ray, depth + 1)
-
-                # Weight using Phong BRDF (cos^n term)
-                cos_theta = max(perturbed_dir.dot(ideal_reflect_dir), 0)
-                weight = (phong_exponent + 2) / (2 * np.pi) * (cos_theta ** phong_exponent)
-
-                reflection_color += sample_color * weight  # Accumulate weighted color
-                total_weight += weight  # Accumulate total weight
-
-            # Normalize the final reflection color by the total weight
-            if total_weight > 0:
-                reflection_color = reflection_color * (1 / total_weight)  # Normalize by total weight
-
-            reflection_color = reflection_color * obj.kr  # Apply the reflection coefficient
-            illumination = illumination * (1 - obj.kr) + reflection_color
-
-        return illumination
-
-    @staticmethod
-    def sample_phong_lobe(ideal_dir, exponent):
-        """
-        Sample a direction around the ideal reflection direction using a Phong lobe distribution.
-        :param ideal_dir: Ideal reflection direction
-        :param exponent: Phong exponent controlling the glossiness
-        :return: Sampled direction in world space
-        """
-        # Sample spherical coordinates
-        u = random.random()
-        v = random.random()
-        theta = math.acos(u ** (1 / (exponent + 1)))
-        phi = 2 * math.pi * v
-
-        # Convert to cartesian coordinates in local space
-        x = math.sin(theta) * math.cos(phi)
-        y = math.sin(theta) * math.sin(phi)
-        z = math.cos(theta)
-
-        # Build orthonormal basis (w = ideal_dir, u,v = perpendiculars)
-        w = ideal_dir.normalize()
-        up = Vector(0, 1, 0) if abs(w.y) < 0.9 else Vector(1, 0, 0)
-        u = w.cross(up).normalize()
-        v = w.cross(u)
-
-        # Rotate sampled direction into world space
-        direction = u * x + v * y + w * z
-        return direction.normalize()
+            d_dot_n = ray.direction.dot(N)
+            if d_dot_n > 0:
+                Nn, η = -N, obj.refractive_index
+            cos_i = abs(d_dot_n)  # -ray.direction.dot(Nn)
+
+            # Fresnel weights first, a ray is only traced if its contribution to the pixel is noticeable
+            refracted, rx, ry, rz, F = refract(ray._dx, ray._dy, ray._dz, Nn.x, Nn.y, Nn.z, cos_i, η,
+                                               obj.fresnel_f0)
+            if not refracted:
+                F = 1.0  # total internal reflection
+
+            # reflection scaled by F * kr, refraction by (1 - F) * kt
+            weight = F * kr
+            if weight >= MIN_RAY_WEIGHT:
+                if past_depth:
+                    r, g, b = r + background[0] * weight, g + background[1] * weight, b + background[2] * weight
+                else:
+                    refl_o = P + Nn * 1e-4
+                    refl_d = (ray.direction + Nn * (2 * cos_i)).normalize()
+                    children.append((Ray(refl_o, refl_d, space=space, normalize=False), weight))
+
+            weight = (1 - F) * kt
+            if refracted and weight >= MIN_RAY_WEIGHT:
+                if past_depth:
+                    r, g, b = r + background[0] * weight, g + background[1] * weight, b + background[2] * weight
+                else:
+                    rdir = Vector(rx, ry, rz)
+                    children.append((Ray(P + rdir * 1e-4, rdir, space=space, normalize=False), weight))
+
+        return r, g, b, children
 
     @staticmethod
     def clamp_color(color):
@@ -301,14 +394,28 @@ class World:
         )
 
     @staticmethod
-    def calculate_normal(obj, intersection_point):
+    def surface(hit):
+        """
+        Identify the surface of a hit, used as ray space for rays leaving it.
+        :param hit: Hit dictionary
+        :return: The object that was hit, or a (mesh, face) tuple for a triangle of a TriangleMesh
+        """
+        if 'face' in hit:
+            return hit['object'], hit['face']
+        return hit['object']
+
+    @staticmethod
+    def calculate_normal(obj, intersection_point, face=None):
         """
         Calculate the normal at the intersection point based on the object type.
         :param obj: Object that was hit
         :param intersection_point: Point of intersection of the ray with the object
+        :param face: Index of the triangle that was hit if obj is a TriangleMesh
         :return: Normal vector at the intersection point
         """
-        if isinstance(obj, Polygon):
+        if isinstance(obj, TriangleMesh):
+            normal = Vector(*obj.normals[face].tolist())
+        elif isinstance(obj, Polygon):
             # Polygon normal calculation
             v0, v1, v2 = obj.vertices
             normal = (v1 - v0).cross(v2 - v0).normalize()
@@ -335,33 +442,13 @@ class World:
         Cast a ray toward the light, multiplying through any kt’s you hit.
         Returns a float in [0,1]: 0=fully blocked, 1=fully clear.
         """
-        tr = 1.0
-        eps = 1e-4
-
-        # keep marching the ray until it reaches the light or is fully blocked
-        while True:
-            hit = self.kd_tree.intersect(shadow_ray)
-            if not hit or hit['t'] > max_dist:
-                break
-
-            o = hit['object']
-            # skip self‐hit
-            if o is shadow_ray.space:
-                # advance origin past this surface
-                shadow_ray.origin = shadow_ray.origin + shadow_ray.direction * (hit['t'] + eps)
-                continue
-
-            # attenuate by this object’s transparency
-            # (kt=1 means fully clear, kt=0 means opaque)
-            tr *= o.kt
-            if tr <= 0:
-                return 0.0
+        # every surface between the hit and the light, found in one traversal that skips shadow_ray.space
+        hits = self.kd_tree.intersect_all(shadow_ray, max_dist)
 
-            # march onward from just past this surface
-            shadow_ray.origin = shadow_ray.origin + shadow_ray.direction * (hit['t'] + eps)
-            # keep the same shadow_ray.direction, keep shadow_ray.space=None
-
-        return tr
+        # attenuate by each object’s transparency
+        # (kt=1 means fully clear, kt=0 means opaque)
+        kts = np.fromiter((hit['object'].kt for hit in hits), float)
+        return float(kts.prod())
 
     def set_scene_transformation(self, translation, scale):
         """
@@ -386,3 +473,27 @@ class World:
 
         self.scene_matrix = np.dot(translation_matrix, scale_matrix)
 
+
+@njit(cache=True)
+def refract(dx, dy, dz, nx, ny, nz, cos_i, eta, f0):
+    """
+    Refract a unit direction through a surface and weight it with Schlick's Fresnel approximation.
+    :param nx, ny, nz: Unit normal on the side the direction comes from
+    :param cos_i: Cosine between the direction and the flipped normal
+    :param eta: Ratio n1 / n2 of the refractive indices
+    :param f0: Fresnel reflectance at normal incidence, ((n1 - n2) / (n1 + n2))^2
+    :return: Tuple (refracted, x, y, z, F), refracted is False on total internal reflection
+    """
+    sin2t = eta * eta * (1 - cos_i * cos_i)
+    if sin2t > 1.0:
+        return False, 0.0, 0.0, 0.0, 1.0
+    cos_t = math.sqrt(1 - sin2t)
+    k = eta * cos_i - cos_t
+    x, y, z = dx * eta + nx * k, dy * eta + ny * k, dz * eta + nz * k
+    length = math.sqrt(x * x + y * y + z * z)
+    if length != 0:
+        x, y, z = x / length, y / length, z / length
+
+    m = 1 - cos_i
+    m2 = m * m
+    return True, x, y, z, f0 + (1 - f0) * (m2 * m2 * m)
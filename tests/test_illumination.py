@@ -0,0 +1,34 @@
+"""
+Tests of the Phong illumination model.
+Run from the repository root with: python -m unittest discover -s tests -t .
+"""
+
+import unittest
+from core.color import Color
+from core.vector import Vector
+from scene.phongIllumination import PhongIllumination
+
+MATERIAL = {'ambient_color': Color(0.1, 0.1, 0.1), 'specular_color': Color(1, 1, 1)}
+
+
+class PhongIlluminationTest(unittest.TestCase):
+    def test_zero_light_vector_leaves_ambient_light(self):
+        # A light placed exactly at the hit point gives a zero light vector, normalized to zero like Vector.normalize
+        phong = PhongIllumination()
+        ad, spec = phong.illuminate_split(Color(1, 0.5, 0.25), Color(1, 1, 1), Vector(0, 1, 0), Vector(0, 0, 0),
+                                          Vector(0, 1, 0), MATERIAL, None)
+        for a, b in zip(ad.rgb, (0.2 * 0.1 * 1, 0.2 * 0.1 * 0.5, 0.2 * 0.1 * 0.25)):
+            self.assertAlmostEqual(a, b)
+        self.assertEqual(spec.rgb, (0.0, 0.0, 0.0))
+
+    def test_light_vector_is_normalized(self):
+        phong = PhongIllumination()
+        args = (Color(1, 1, 1), Color(1, 1, 1), Vector(0, 1, 0))
+        unit = phong.illuminate(*args, Vector(0, 1, 1).normalize(), Vector(0, 1, 0), MATERIAL, None)
+        scaled = phong.illuminate(*args, Vector(0, 7, 7), Vector(0, 1, 0), MATERIAL, None)
+        for a, b in zip(unit.rgb, scaled.rgb):
+            self.assertAlmostEqual(a, b)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Tests of the KD-Tree traversal against brute force intersection of every object.
+Run from the repository root with: python -m unittest discover -s tests -t .
+"""
+
+import unittest
+import numpy as np
+from core.color import Color
+from core.kdTree import KDTree, _march, _slab
+from core.point import Point
+from core.ray import Ray
+from core.vector import Vector
+from objects.cuboid import Cuboid
+from objects.polygon import Polygon
+from objects.sphere import Sphere
+from objects.torus import Torus
+from objects.triangleMesh import TriangleMesh
+
+WHITE = Color(1, 1, 1)
+
+
+def scene_objects(seed=0):
+    """
+    A Cuboid, a TriangleMesh of scattered triangles, a lone Polygon and two objects without a compiled test.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-4, 4, (60, 3))
+    vertices = (centers[:, None, :] + rng.normal(scale=0.6, size=(60, 3, 3))).reshape(-1, 3)
+    return [
+        Cuboid(center=Point(0, 0, 0), width=2, height=1, depth=2, color=WHITE),
+        TriangleMesh(vertices, np.arange(180).reshape(-1, 3), WHITE),
+        Polygon([Point(-4, 3, -1), Point(-2, 3, -1), Point(-3, 4, 0)], color=WHITE),
+        Sphere(Point(3, 1, -2), 1, WHITE),
+        Torus(Point(-3, -1, 2), 1, 0.3, WHITE),
+    ]
+
+
+def random_rays(count, seed=1):
+    """
+    Rays from around the scene aimed at random points near its center, so most of them hit something.
+    """
+    rng = np.random.default_rng(seed)
+    origins = rng.normal(scale=6, size=(count, 3))
+    directions = rng.uniform(-3, 3, (count, 3)) - origins
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    return origins, directions
+
+
+def make_ray(origin, direction, space=None):
+    return Ray(Point(*origin), Vector(*direction), space=space, normalize=False)
+
+
+def brute_force(objects, ray):
+    """
+    Closest hit of the ray over all objects, skipping ray.space (TriangleMesh skips its own face).
+    """
+    best = None
+    for obj in objects:
+        if obj is ray.space:
+            continue
+        hit = obj.intersect(ray)
+        if hit and 1e-4 < hit['t'] and (best is None or hit['t'] < best['t']):
+            best = hit
+    return best
+
+
+class KDTreeTest(unittest.TestCase):
+    def setUp(self):
+        self.objects = scene_objects()
+        self.trees = {'median': KDTree(self.objects, use_gpu=False),
+                      'sah': KDTree(self.objects, use_sah=True, use_gpu=False)}
+        self.origins, self.directions = random_rays(300)
+
+    def assertSameHit(self, hit, expected, msg):
+        self.assertEqual(hit is None, expected is None, msg)
+        if hit is not None:
+            self.assertAlmostEqual(hit['t'], expected['t'], delta=1e-5, msg=msg)
+            self.assertIs(hit['object'], expected['object'], msg)
+
+    def test_intersect(self):
+        hits = 0
+        for name, tree in self.trees.items():
+            for k, (o, d) in enumerate(zip(self.origins.tolist(), self.directions.tolist())):
+                ray = make_ray(o, d)
+                expected = brute_force(self.objects, ray)
+                hits += expected is not None
+                self.assertSameHit(tree.intersect(ray), expected, f'{name} ray {k}')
+        self.assertGreater(hits, 100)
+
+    def test_intersect_skips_space(self):
+        cuboid, mesh = self.objects[:2]
+        for name, tree in self.trees.items():
+            for k, (o, d) in enumerate(zip(self.origins.tolist(), self.directions.tolist())):
+                for space in (cuboid, (mesh, k % len(mesh.faces))):
+                    ray = make_ray(o, d, space)
+                    self.assertSameHit(tree.intersect(ray), brute_force(self.objects, ray), f'{name} ray {k}')
+
+    def test_intersect_batch(self):
+        # The batch reports the closest triangle, rays that reached any other object are pending
+        triangle_objects = self.objects[:3]
+        for name, tree in self.trees.items():
+            t, index, _, _, pending = tree.intersect_batch(self.origins, self.directions)
+            for k, (o, d) in enumerate(zip(self.origins.tolist(), self.directions.tolist())):
+                ray = make_ray(o, d)
+                expected = brute_force(triangle_objects, ray)
+                self.assertEqual(index[k] >= 0, expected is not None, f'{name} ray {k}')
+                if expected is not None:
+                    self.assertAlmostEqual(t[k], expected['t'], delta=1e-5, msg=f'{name} ray {k}')
+                    self.assertIs(tree.hit_info(ray, index[k], t[k], 0.0, 0.0)['object'], expected['object'])
+                closest = brute_force(self.objects, ray)
+                if closest is not None and closest['object'] not in triangle_objects:
+                    self.assertTrue(pending[k], f'{name} ray {k}')
+
+    def test_intersect_batch_skips_spaces(self):
+        cuboid, mesh = self.objects[:2]
+        spaces = [cuboid if k % 2 else (mesh, k % len(mesh.faces)) for k in range(len(self.origins))]
+        t, index, _, _, _ = self.trees['sah'].intersect_batch(self.origins, self.directions, spaces)
+        for k, (o, d) in enumerate(zip(self.origins.tolist(), self.directions.tolist())):
+            expected = brute_force(self.objects[:3], make_ray(o, d, spaces[k]))
+            self.assertEqual(index[k] >= 0, expected is not None, f'ray {k}')
+            if expected is not None:
+                self.assertAlmostEqual(t[k], expected['t'], delta=1e-5, msg=f'ray {k}')
+
+    def test_intersect_all(self):
+        for name, tree in self.trees.items():
+            for k, (o, d) in enumerate(zip(self.origins[:100].tolist(), self.directions[:100].tolist())):
+                ray = make_ray(o, d)
+                expected = sorted(hit['t'] for obj in self.objects for hit in _march(obj, ray, 12.0))
+                found = [hit['t'] for hit in tree.intersect_all(ray, max_dist=12.0)]
+                np.testing.assert_allclose(found, expected, atol=1e-5, err_msg=f'{name} ray {k}')
+
+    def test_slab(self):
+        nodes = self.trees['median'].nodes
+        bounds = nodes[0]['bounds'].astype(np.float64)
+        rng = np.random.default_rng(2)
+        directions = np.vstack((self.directions, np.eye(3), -np.eye(3)))
+        for o in rng.uniform(-8, 8, (50, 3)):
+            for d in directions:
+                with np.errstate(divide='ignore'):
+                    inv = np.where(d == 0, np.inf, 1.0 / d)
+                sign = (inv < 0).astype(np.int64)
+                entry, exit_ = _slab(nodes, 0, *o, *inv, *sign)
+
+                with np.errstate(invalid='ignore'):
+                    t0 = (bounds[0] - o) * inv
+                    t1 = (bounds[1] - o) * inv
+                near = np.where(np.isnan(t0), -np.inf, np.minimum(t0, t1))
+                far = np.where(np.isnan(t0), np.inf, np.maximum(t0, t1))
+                self.assertAlmostEqual(entry, max(near.max(), 0.0), delta=1e-9)
+                self.assertAlmostEqual(exit_, far.min(), delta=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+"""
+Tests of load_ply on the small PLY files in tests/fixtures.
+Run from the repository root with: python -m unittest discover -s tests -t .
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from core.color import Color
+from ply_parser import load_ply
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+TETRAHEDRON_FACES = [[0, 2, 1], [0, 1, 3], [0, 3, 2], [1, 2, 3]]
+
+
+def fixture(name):
+    return os.path.join(FIXTURES, name)
+
+
+class LoadPlyTest(unittest.TestCase):
+    def test_ascii(self):
+        # Normals are ignored and the quad face is skipped
+        mesh = load_ply(fixture('tetrahedron_ascii.ply'), Color(1, 1, 1))
+        np.testing.assert_array_equal(mesh.vertices, [[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1], [0.5, 0.5, 0.5]])
+        np.testing.assert_array_equal(mesh.faces, TETRAHEDRON_FACES)
+
+    def test_binary(self):
+        # Extra vertex and face properties are read past, both byte orders give the same mesh
+        for name in ('tetrahedron_binary_little.ply', 'tetrahedron_binary_big.ply'):
+            mesh = load_ply(fixture(name), Color(1, 1, 1), kr=0.2)
+            np.testing.assert_array_equal(mesh.vertices, [[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1.5]])
+            np.testing.assert_array_equal(mesh.faces, TETRAHEDRON_FACES)
+            self.assertEqual(mesh.vertices.dtype, np.float64)
+            self.assertEqual(mesh.kr, 0.2)
+
+    def test_binary_rejects_non_triangular_faces(self):
+        header = (b"ply\nformat binary_little_endian 1.0\nelement vertex 4\nproperty float x\nproperty float y\n"
+                  b"property float z\nelement face 1\nproperty list uchar int vertex_indices\nend_header\n")
+        vertices = np.zeros(12, dtype='<f4').tobytes()
+        quad = np.array([4], dtype='u1').tobytes() + np.arange(4, dtype='<i4').tobytes()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'quad.ply')
+            with open(path, 'wb') as f:
+                f.write(header + vertices + quad)
+            with self.assertRaises(ValueError):
+                load_ply(path, Color(1, 1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Tests of the batched texture lookups against the per-point ones.
+Run from the repository root with: python -m unittest discover -s tests -t .
+"""
+
+import unittest
+import numpy as np
+from core import cudaTraversal
+from core.color import Color
+from core.point import Point
+from core.ray import Ray
+from core.vector import Vector
+from objects.sphere import Sphere
+from procedural_textures.brickTexture import BrickTexture
+from procedural_textures.checkerboardTexture import CheckerboardTexture
+from procedural_textures.mandelbrotTexture import MandelbrotTexture
+from procedural_textures.mosaicTexture import MosaicTexture
+from scene.imageTexture import ImageTexture
+from scene.world import World
+
+
+def sample_points(count=20000, seed=0):
+    """
+    Random points, half of them snapped to a 1/20 grid so many land exactly on pattern edges.
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(-20, 20, (count, 3))
+    points[::2] = np.round(points[::2] * 20) / 20
+    return points
+
+
+def scalar_colors(texture, points):
+    return np.array([texture.illuminate(None, None, None, None, None, None, Point(*p)).rgb
+                     for p in points.tolist()], dtype=np.float32)
+
+
+class TextureBatchTest(unittest.TestCase):
+    def assertBatchMatchesScalar(self, texture, points=None):
+        points = sample_points() if points is None else points
+        np.testing.assert_array_equal(texture.illuminate_batch(points), scalar_colors(texture, points))
+
+    def test_brick(self):
+        self.assertBatchMatchesScalar(BrickTexture())
+        self.assertBatchMatchesScalar(BrickTexture(brick_width=0.7, brick_height=0.3, mortar_thickness=0.1))
+
+    def test_checkerboard(self):
+        self.assertBatchMatchesScalar(CheckerboardTexture())
+        self.assertBatchMatchesScalar(CheckerboardTexture(check_size=3))
+
+    def test_mosaic(self):
+        self.assertBatchMatchesScalar(MosaicTexture())
+        self.assertBatchMatchesScalar(MosaicTexture(cell_count=3, border_thickness=0.2, seed=7))
+
+    def test_mandelbrot(self):
+        # The batch iterates in float32 and returns 8-bit colors, so it agrees with illuminate up to 1/255 except
+        # on the few points right at the set boundary, where the escape count is chaotic
+        texture = MandelbrotTexture()
+        points = np.random.default_rng(1).uniform(-4, 4, (20000, 3))
+        batch = texture.illuminate_batch(points)
+        error = np.abs(batch - scalar_colors(texture, points)).max(axis=1)
+        self.assertEqual(batch.dtype, np.float32)
+        np.testing.assert_allclose(batch * 255, np.round(batch * 255), atol=1e-4)
+        self.assertLess(np.count_nonzero(error > 1 / 255 + 1e-6), len(points) // 100)
+
+        # Points deep inside the set and far outside of it
+        points = np.array([[-0.375, 0.0, 0.0], [0.0, 0.0, 0.0], [4.0, 4.0, 0.0]])
+        np.testing.assert_allclose(texture.illuminate_batch(points), scalar_colors(texture, points), atol=0.5 / 255)
+
+
+class ImageTextureTest(unittest.TestCase):
+    @staticmethod
+    def baseline_colors(texture, points):
+        """
+        Texels picked by the original lookup, tex[int((1 - v) * (H - 1)), int(u * (W - 1))].
+        """
+        return np.array([texture.tex[int((1.0 - y % 1.0) * texture.h1), int(x % 1.0 * texture.w1)]
+                         for x, y, _ in points.tolist()])
+
+    def assertLookupsMatchBaseline(self, texture, points):
+        expected = self.baseline_colors(texture, points)
+        np.testing.assert_array_equal(scalar_colors(texture, points), expected)
+        np.testing.assert_array_equal(texture.illuminate_batch(points), expected)
+
+    def test_edges(self):
+        texture = ImageTexture()
+        edges = [0.0, 1.0, np.nextafter(0.0, 1.0), np.nextafter(1.0, 0.0), -1e-17, 2.0, -1.0, 0.5]
+        points = np.array([(u, v, 0.0) for u in edges for v in edges])
+        self.assertLookupsMatchBaseline(texture, points)
+
+    def test_random_uvs(self):
+        texture = ImageTexture()
+        self.assertLookupsMatchBaseline(texture, np.random.default_rng(3).uniform(-2, 2, (5000, 3)))
+
+
+@unittest.skipUnless(cudaTraversal.available(), 'no CUDA device, set NUMBA_ENABLE_CUDASIM=1 to use the simulator')
+class CudaTextureTest(unittest.TestCase):
+    def test_gpu_matches_cpu(self):
+        points = np.random.default_rng(2).uniform(-4, 4, (2000, 3))
+        for texture_class in (MandelbrotTexture, MosaicTexture):
+            gpu = texture_class(use_gpu=True).illuminate_batch(points)
+            cpu = texture_class(use_gpu=False).illuminate_batch(points)
+            error = np.abs(gpu - cpu).max(axis=1)
+            # Both Mandelbrot kernels iterate in float32 but may round the smoothing differently
+            self.assertLess(np.count_nonzero(error > 1 / 255 + 1e-6), len(points) // 100, texture_class.__name__)
+
+
+class PrimaryBatchShadingTest(unittest.TestCase):
+    def test_textured_hits_match_single_ray_path(self):
+        world = World()
+        world.light_source = {'position': Point(0, 10, 10), 'color': Color(1, 1, 1)}
+        world.add(Sphere(Point(0, 0, -5), 2, Color(1, 1, 1), illumination_model='checkerboard'),
+                  Sphere(Point(3, 1, -6), 1.5, Color(1, 1, 1), illumination_model='brick'),
+                  Sphere(Point(-3, -1, -6), 1.5, Color(1, 1, 1), illumination_model='mosaic'))
+
+        xs, ys = np.meshgrid(np.linspace(-0.6, 0.6, 12), np.linspace(-0.5, 0.5, 10))
+        directions = np.stack([xs.ravel(), ys.ravel(), -np.ones(xs.size)], axis=1)
+        directions /= np.linalg.norm(directions, axis=1)[:, None]
+        origins = np.zeros_like(directions)
+
+        batch = world.spawn_primary_rays(origins, directions)
+        single = [world.spawn_ray(Ray(Point(*o), Vector(*d))).rgb for o, d in zip(origins, directions)]
+        np.testing.assert_allclose(batch, np.array(single, dtype=np.float32), atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
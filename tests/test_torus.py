@@ -0,0 +1,90 @@
+"""
+Tests of the closed-form quartic solver used by Torus against numpy.roots.
+Run from the repository root with: python -m unittest discover -s tests -t .
+"""
+
+import unittest
+import numpy as np
+from objects.torus import solve_quartic
+
+
+def solve(coefficients):
+    n, *roots = solve_quartic(*[float(c) for c in coefficients])
+    return np.sort(roots[:n])
+
+
+def real_roots(coefficients, tolerance=1e-9):
+    roots = np.roots(coefficients)
+    return np.sort(roots[np.abs(roots.imag) < tolerance].real)
+
+
+class SolveQuarticTest(unittest.TestCase):
+    def assertRootsMatch(self, coefficients, expected, atol=1e-7):
+        np.testing.assert_allclose(solve(coefficients), expected, atol=atol, err_msg=str(coefficients))
+
+    def test_four_real_roots(self):
+        rng = np.random.default_rng(0)
+        for _ in range(500):
+            roots = np.sort(rng.uniform(-5, 5, 4))
+            if np.min(np.diff(roots)) < 0.05:
+                continue
+            coefficients = rng.uniform(0.5, 3) * np.poly(roots)
+            self.assertRootsMatch(coefficients, real_roots(coefficients))
+            self.assertRootsMatch(coefficients, roots)
+
+    def test_random_coefficients(self):
+        rng = np.random.default_rng(1)
+        for _ in range(2000):
+            coefficients = rng.normal(size=5)
+            roots = np.roots(coefficients)
+            # Skip quartics with roots too close together to tell real roots from a complex pair
+            gaps = np.abs(roots[:, None] - roots[None, :]) + np.eye(len(roots))
+            if gaps.min() < 1e-3:
+                continue
+            self.assertRootsMatch(coefficients, real_roots(coefficients), atol=1e-6)
+
+    def test_complex_pairs(self):
+        # Two real roots and a complex pair, and two complex pairs
+        self.assertRootsMatch(np.polymul(np.poly([-1.5, 2.0]), [1, 0, 1]), [-1.5, 2.0])
+        self.assertRootsMatch(np.polymul([1, -2, 5], [1, 0, 1]), [])
+        self.assertRootsMatch([1, 0, 0, 0, 1], [])
+
+    def test_biquadratic(self):
+        # Roots symmetric about the shift leave no linear term in the depressed quartic
+        self.assertRootsMatch(np.poly([-2, -1, 1, 2]), [-2, -1, 1, 2])
+        self.assertRootsMatch(np.poly([0.5, 1.5, 3.5, 4.5]), [0.5, 1.5, 3.5, 4.5])
+        self.assertRootsMatch(np.poly([1.0, 2.0, 3.0, 4.0 + 1e-10]), [1.0, 2.0, 3.0, 4.0], atol=1e-6)
+
+    def test_double_roots(self):
+        # A double root may be reported twice or not at all (a ray grazing the torus), the simple roots are exact
+        rng = np.random.default_rng(2)
+        for _ in range(200):
+            double, first, second = rng.uniform(-4, 4, 3)
+            if min(abs(double - first), abs(double - second), abs(first - second)) < 0.1:
+                continue
+            found = solve(np.poly([double, double, first, second]))
+            for root in (first, second):
+                self.assertLess(np.min(np.abs(found - root)), 1e-7)
+            self.assertIn(len(found), (2, 4))
+            self.assertTrue(np.all(np.min(np.abs(found[:, None] - [double, first, second]), axis=1) < 1e-4))
+
+        # Two double roots and a quadruple root
+        self.assertTrue(np.all(np.abs(solve(np.poly([1, 1, -2, -2]))[:, None] - [1, -2]).min(axis=1) < 1e-4))
+        self.assertTrue(np.all(np.abs(solve(np.poly([0.5] * 4)) - 0.5) < 1e-3))
+
+    def test_near_degenerate(self):
+        # No quartic term, the torus always has a = |d|^4 = 1
+        self.assertEqual(solve_quartic(0.0, 1.0, 2.0, 3.0, 4.0)[0], 0)
+
+        # Nearly double roots, nearly biquadratic quartics and a ray from far away with clustered roots,
+        # solved at least as accurately as numpy.roots
+        for roots in ([1.0, 1.0 + 1e-6, 2.0, 3.0], [-1.0, -1.0 + 1e-5, 0.5, 0.5 + 1e-5], [1.0, 2.0, 3.0, 4.0 + 1e-10],
+                      [-2.0, -1.0, 1.0, 2.0 + 1e-6], [50.0, 50.2, 51.0, 51.2], [1000.0, 1000.5, 1001.5, 1002.0]):
+            coefficients = np.poly(roots)
+            error = np.max(np.abs(solve(coefficients) - roots))
+            numpy_error = np.max(np.abs(real_roots(coefficients, tolerance=1e-3) - roots))
+            self.assertLessEqual(error, max(numpy_error, 1e-10), roots)
+
+
+if __name__ == '__main__':
+    unittest.main()
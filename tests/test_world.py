@@ -0,0 +1,49 @@
+"""
+Tests of World shading helpers.
+Run from the repository root with: python -m unittest discover -s tests -t .
+"""
+
+import unittest
+from core.color import Color
+from core.point import Point
+from core.ray import Ray
+from core.vector import Vector
+from objects.cuboid import Cuboid
+from objects.sphere import Sphere
+from scene.world import World
+
+
+def shadow_world(kt):
+    """
+    A cuboid of transparency kt floating between the origin and a light straight above it.
+    """
+    world = World()
+    world.light_source = {'position': Point(0, 10, 0), 'color': Color(1, 1, 1)}
+    world.add(Cuboid(center=Point(0, 3, 0), width=2, height=1, depth=2, color=Color(0, 1, 0), kt=kt))
+    return world
+
+
+class ShadowFactorTest(unittest.TestCase):
+    def test_batch_matches_single_for_transparent_cuboid(self):
+        world = shadow_world(0.6)
+        shadow_ray = Ray(Point(0.1, 0, 0.2), Vector(0, 1, 0))
+        self.assertAlmostEqual(world.shadow_factor(shadow_ray), 0.4)
+        self.assertAlmostEqual(world.shadow_factors([shadow_ray])[0], 0.4)
+
+    def test_batch_matches_single_for_opaque_cuboid(self):
+        world = shadow_world(0.0)
+        shadow_rays = [Ray(Point(0.1, 0, 0.2), Vector(0, 1, 0)), Ray(Point(5, 0, 0), Vector(0, 1, 0))]
+        self.assertEqual(world.shadow_factors(shadow_rays), [world.shadow_factor(ray) for ray in shadow_rays])
+        self.assertEqual(world.shadow_factors(shadow_rays), [0.0, 1.0])
+
+    def test_batch_falls_back_for_objects_without_compiled_test(self):
+        world = shadow_world(0.6)
+        world.add(Sphere(center=Point(5, 3, 0), radius=0.5, color=Color(1, 0, 0), kt=0.25))
+        shadow_rays = [Ray(Point(5, 0, 0), Vector(0, 1, 0)), Ray(Point(0, 0, 0), Vector(0, 1, 0))]
+        factors = world.shadow_factors(shadow_rays)
+        self.assertAlmostEqual(factors[0], 0.75)
+        self.assertAlmostEqual(factors[1], 0.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
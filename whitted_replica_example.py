@@ -94,7 +94,7 @@ def main():
         width=500, height=500  # Image size
     )
 
-    hdr_image = camera.render(world)  # Pass KD-tree to the render function
+    hdr_image = camera.render(world, workers=os.cpu_count())  # Tiles are rendered by one process per CPU
 
     # To render without tone reproduction, uncomment the following lines:
     # # Display the image using matplotlib